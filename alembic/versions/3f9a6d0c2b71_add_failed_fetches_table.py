@@ -0,0 +1,51 @@
+"""Add failed_fetches table
+
+Revision ID: 3f9a6d0c2b71
+Revises: 7c1e4b2a9d3f
+Create Date: 2026-10-18 14:03:17.552904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a6d0c2b71'
+down_revision: Union[str, None] = '7c1e4b2a9d3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('failed_fetches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('target', sa.String(), nullable=False),
+    sa.Column('page', sa.Integer(), nullable=True),
+    sa.Column('error_class', sa.String(), nullable=False),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('datetime_first_failed', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('datetime_last_failed', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('datetime_next_attempt', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_failed_fetches_id'), 'failed_fetches', ['id'], unique=False)
+    op.create_index(op.f('ix_failed_fetches_url'), 'failed_fetches', ['url'], unique=True)
+    op.create_index(op.f('ix_failed_fetches_status'), 'failed_fetches', ['status'], unique=False)
+    op.create_index(
+        op.f('ix_failed_fetches_datetime_next_attempt'), 'failed_fetches', ['datetime_next_attempt'], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_failed_fetches_datetime_next_attempt'), table_name='failed_fetches')
+    op.drop_index(op.f('ix_failed_fetches_status'), table_name='failed_fetches')
+    op.drop_index(op.f('ix_failed_fetches_url'), table_name='failed_fetches')
+    op.drop_index(op.f('ix_failed_fetches_id'), table_name='failed_fetches')
+    op.drop_table('failed_fetches')
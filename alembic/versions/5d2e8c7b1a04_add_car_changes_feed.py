@@ -0,0 +1,79 @@
+"""Add car_changes feed table and trigger
+
+Revision ID: 5d2e8c7b1a04
+Revises: b84d1f3e6a25
+Create Date: 2026-10-19 09:12:44.301582
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8c7b1a04'
+down_revision: Union[str, None] = 'b84d1f3e6a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Upserts that only refresh the write or fetch time or the HTTP validators are not changes of the listing.
+IGNORED_COLUMNS = "'datetime_updated', 'datetime_fetched', 'http_etag', 'http_last_modified'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('car_changes',
+    sa.Column('seq', sa.BigInteger(), nullable=False),
+    sa.Column('car_id', sa.Integer(), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('op', sa.String(), nullable=False),
+    sa.Column('txid', sa.BigInteger(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index(op.f('ix_car_changes_car_id'), 'car_changes', ['car_id'], unique=False)
+    op.create_index(op.f('ix_car_changes_changed_at'), 'car_changes', ['changed_at'], unique=False)
+    op.create_index('ix_car_changes_txid_seq', 'car_changes', ['txid', 'seq'], unique=False)
+
+    # Bulk loads such as the load test seeder set `ria.skip_change_feed` to stay out of the feed.
+    # The notification has no payload, so Postgres folds those of one transaction into one.
+    op.execute(f"""
+        CREATE FUNCTION record_car_change() RETURNS trigger AS $$
+        DECLARE
+            car cars%ROWTYPE;
+        BEGIN
+            IF current_setting('ria.skip_change_feed', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'DELETE' THEN
+                car := OLD;
+            ELSE
+                car := NEW;
+            END IF;
+            IF TG_OP = 'UPDATE'
+                AND to_jsonb(NEW) - ARRAY[{IGNORED_COLUMNS}] = to_jsonb(OLD) - ARRAY[{IGNORED_COLUMNS}] THEN
+                RETURN NULL;
+            END IF;
+            INSERT INTO car_changes (car_id, url, op, txid)
+            VALUES (car.id, car.url, lower(TG_OP), pg_current_xact_id()::text::bigint);
+            PERFORM pg_notify('car_changes', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER cars_change_feed
+        AFTER INSERT OR UPDATE OR DELETE ON cars
+        FOR EACH ROW EXECUTE FUNCTION record_car_change()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER cars_change_feed ON cars")
+    op.execute("DROP FUNCTION record_car_change()")
+    op.drop_index('ix_car_changes_txid_seq', table_name='car_changes')
+    op.drop_index(op.f('ix_car_changes_changed_at'), table_name='car_changes')
+    op.drop_index(op.f('ix_car_changes_car_id'), table_name='car_changes')
+    op.drop_table('car_changes')
@@ -0,0 +1,51 @@
+"""Add dumps table and cars.datetime_updated
+
+Revision ID: 7c1e4b2a9d3f
+Revises: 051c9c2c53a9
+Create Date: 2026-10-18 10:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b2a9d3f'
+down_revision: Union[str, None] = '051c9c2c53a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cars', sa.Column(
+        'datetime_updated', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False,
+    ))
+    op.create_index(op.f('ix_cars_datetime_updated'), 'cars', ['datetime_updated'], unique=False)
+
+    op.create_table('dumps',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('path', sa.String(), nullable=True),
+    sa.Column('checksum', sa.String(), nullable=True),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+    sa.Column('rows_count', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('datetime_started', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('datetime_finished', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_dumps_id'), 'dumps', ['id'], unique=False)
+    op.create_index(op.f('ix_dumps_status'), 'dumps', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_dumps_status'), table_name='dumps')
+    op.drop_index(op.f('ix_dumps_id'), table_name='dumps')
+    op.drop_table('dumps')
+    op.drop_index(op.f('ix_cars_datetime_updated'), table_name='cars')
+    op.drop_column('cars', 'datetime_updated')
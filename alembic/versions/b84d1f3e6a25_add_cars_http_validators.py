@@ -0,0 +1,33 @@
+"""Add HTTP validators and fetch time to cars
+
+Revision ID: b84d1f3e6a25
+Revises: 3f9a6d0c2b71
+Create Date: 2026-10-18 16:41:02.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b84d1f3e6a25'
+down_revision: Union[str, None] = '3f9a6d0c2b71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cars', sa.Column('http_etag', sa.String(), nullable=True))
+    op.add_column('cars', sa.Column('http_last_modified', sa.String(), nullable=True))
+    op.add_column('cars', sa.Column('datetime_fetched', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE cars SET datetime_fetched = datetime_updated")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('cars', 'datetime_fetched')
+    op.drop_column('cars', 'http_last_modified')
+    op.drop_column('cars', 'http_etag')
@@ -1,17 +1,42 @@
-from typing import Annotated
+import asyncio
+import datetime
+import decimal
+import json
+import logging
+from collections.abc import AsyncIterator
+from typing import Annotated, Any, Literal
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Path, Query
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Path, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-from app.db import Car
+from app.api.schemas import (
+    CarChangeSchema,
+    ChangesSchema,
+    DumpSchema,
+    FailedFetchSchema,
+    LookupSchema,
+    RequeueSchema,
+)
+from app.db import Car, Dump, FailedFetch
+from app.db.changes import CURSOR_PATTERN, ChangeFeed, change_broadcaster
+from app.db.dumper import Dumper, DumpException, DumpKind
 from app.db.manager import DBManager
+from app.db.retries import RetryQueue
+from app.profiling import PROFILE_MAX_SECONDS, PROFILING_ENABLED, ProfilingException, loop_monitor, profiler
 from app.scraper.schemas import CarSchema
-from app.scraper.scraper import Scraper
+from app.scraper.snapshots import SnapshotStore
+from app.scraper.targets import load_targets
+
+logger = logging.getLogger(__name__)
+
+# The scraper stack (aiohttp, parsel/lxml) is imported inside the background tasks
+# that need it, so that API-only processes never load it.
 
 api = APIRouter()
 
 
 @api.get("/cars/{car_id}", response_model=CarSchema)
-async def get_car(car_id: Annotated[int, Path(..., ge=1)]) -> Car:
+async def get_car(car_id: Annotated[int, Path(..., ge=1)]) -> Car | dict:
     """Fetch a car object from the database based on the provided car ID.
 
     Returns it as a structured response. Raises an HTTPException if no car is found for the specified ID.
@@ -35,20 +60,195 @@ async def list_cars(
     """
     return await DBManager.read_list(limit=limit, offset=offset)
 
+def _json_default(value: Any) -> Any:  # noqa: ANN401
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    message = f"Object of type {type(value).__name__} is not JSON serializable"
+    raise TypeError(message)
+
+@api.post("/cars/lookup", response_class=StreamingResponse)
+async def lookup_cars(body: LookupSchema) -> StreamingResponse:
+    """Look up many cars by ID and/or URL in one request.
+
+    The response is newline-delimited JSON: one line per car found, with only the requested `fields`
+    (all fields by default; `id` and `url` are always included), followed by one final
+    `{"misses": {"ids": [...], "urls": [...]}}` line listing the keys that matched no car.
+    A response without that final line was cut short.
+    """
+    columns = list(dict.fromkeys(["id", "url", *(body.fields or ["id", *CarSchema.model_fields])]))
+    ids = list(dict.fromkeys(body.ids))
+    urls = list(dict.fromkeys(body.urls))
+
+    async def lines() -> AsyncIterator[str]:
+        found_ids, found_urls = set(), set()
+        for key, values in (("id", ids), ("url", urls)):
+            async for rows in DBManager.lookup(key=key, values=values, columns=columns):
+                for row in rows:
+                    found_urls.add(row["url"])
+                    if row["id"] in found_ids:
+                        continue
+                    found_ids.add(row["id"])
+                    yield json.dumps(dict(row), default=_json_default) + "\n"
+        misses = {
+            "ids": [car_id for car_id in ids if car_id not in found_ids],
+            "urls": [url for url in urls if url not in found_urls],
+        }
+        yield json.dumps({"misses": misses}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@api.get("/changes/", response_model=ChangesSchema)
+async def list_changes(
+        since: Annotated[str, Query(pattern=CURSOR_PATTERN)] = "0",
+        limit: Annotated[int, Query(ge=1, le=10000)] = 1000,
+) -> dict:
+    """Fetch the inserts, updates and deletes of cars after the change cursor `since`, oldest first.
+
+    Pass the returned `next_since` as `since` to get the following changes; `0` starts at the oldest
+    change kept. The changed cars themselves can be fetched with `POST /cars/lookup`.
+    """
+    changes = await ChangeFeed.read(since=since, limit=limit)
+    return {"changes": changes, "next_since": changes[-1].cursor if changes else since}
+
+@api.get("/changes/stream", response_class=StreamingResponse)
+async def stream_changes(
+        request: Request,
+        since: Annotated[str, Query(pattern=CURSOR_PATTERN)] = "0",
+        last_event_id: Annotated[str | None, Header(pattern=CURSOR_PATTERN)] = None,
+) -> StreamingResponse:
+    """Stream the car change feed after the cursor `since` as server-sent events.
+
+    Every change is a `change` event whose ID is its cursor, so reconnecting clients resume
+    after the last event they received (`Last-Event-ID`). Changes are pushed when the writes are
+    committed, and a keep-alive comment is sent when nothing changed for `CHANGES_POLL_INTERVAL` seconds.
+    """
+    limit = 1000
+
+    async def events() -> AsyncIterator[str]:
+        cursor = last_event_id or since
+        async with change_broadcaster.subscribe() as notified:
+            while not await request.is_disconnected():
+                notified.clear()
+                changes = await ChangeFeed.read(since=cursor, limit=limit)
+                for change in changes:
+                    data = CarChangeSchema.model_validate(change).model_dump_json()
+                    yield f"id: {change.cursor}\nevent: change\ndata: {data}\n\n"
+                if changes:
+                    cursor = changes[-1].cursor
+                if len(changes) < limit and not await change_broadcaster.wait(notified):
+                    yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @api.post("/dump/")
-async def trigger_dump(background_tasks: BackgroundTasks) -> dict[str, str]:
-    """Trigger a database dump task asynchronously."""
+async def trigger_dump(background_tasks: BackgroundTasks, kind: DumpKind = "full") -> dict[str, str | int]:
+    """Trigger a database dump task asynchronously.
+
+    Returns the ID of the dump, which can be used to poll its status and checksum via `GET /dump/{dump_id}`.
+    """
+    dumper = Dumper()
+    record = await dumper.create(kind)
+
     async def dump_task() -> None:
-        await DBManager().dump()
+        try:
+            await dumper.run(record.id)
+        except DumpException:
+            logger.exception("Database dump #%s failed", record.id)
+
     background_tasks.add_task(dump_task)
-    return {"message": "Database dump initiated"}
+    return {"message": "Database dump initiated", "dump_id": record.id}
+
+@api.get("/dump/{dump_id}", response_model=DumpSchema)
+async def get_dump(dump_id: Annotated[int, Path(..., ge=1)]) -> Dump:
+    """Fetch the status, location and checksum of a database dump."""
+    dump = await Dumper.read_one(dump_id)
+    if not dump:
+        raise HTTPException(status_code=404, detail=f"Dump with id={dump_id} not found")
+    return dump
 
 @api.post("/scrape/")
-async def fetch_cars(background_tasks: BackgroundTasks) -> dict[str, str]:
-    """Trigger a scraping task asynchronously."""
+async def fetch_cars(
+        background_tasks: BackgroundTasks,
+        target: Annotated[list[str] | None, Query()] = None,
+) -> dict[str, str]:
+    """Trigger a scraping task asynchronously.
+
+    All crawl targets are scraped unless one or more `target` names are given.
+    """
+    targets = [item for item in load_targets() if not target or item.name in target]
+    if not targets:
+        raise HTTPException(status_code=404, detail=f"No crawl targets named {', '.join(target)}")
+
     async def scraping_task() -> None:
-        async with Scraper() as scraper:
-            await scraper.start()
+        from app.scraper.sharding import run_crawl
+
+        await run_crawl(targets)
 
     background_tasks.add_task(scraping_task)
     return {"message": "Scraping process initiated"}
+
+@api.post("/reparse/")
+async def reparse_snapshots(background_tasks: BackgroundTasks) -> dict[str, str]:
+    """Trigger a reparse of all stored page snapshots asynchronously."""
+    store = SnapshotStore.from_env()
+    if store is None:
+        raise HTTPException(status_code=409, detail="Snapshot store is not configured (SNAPSHOT_DIR)")
+
+    async def reparse_task() -> None:
+        from app.scraper.reparse import Reparser
+
+        await Reparser(store).run()
+
+    background_tasks.add_task(reparse_task)
+    return {"message": "Reparse of snapshots initiated"}
+
+@api.get("/failures/", response_model=list[FailedFetchSchema])
+async def list_failures(
+        status: Literal["pending", "dead"] | None = None,
+        limit: Annotated[int, Query(ge=1, le=1000)] = 50,
+        offset: Annotated[int, Query(ge=0)] = 0,
+) -> list[FailedFetch]:
+    """Fetch a paginated list of failed fetches, optionally only pending retries or dead letters."""
+    return await RetryQueue.read_list(status=status, limit=limit, offset=offset)
+
+@api.post("/failures/requeue")
+async def requeue_failures(body: RequeueSchema) -> dict[str, str | int]:
+    """Reset failed fetches to pending so that the next retry run picks them up."""
+    count = await RetryQueue.requeue(body.ids)
+    return {"message": "Failed fetches requeued", "requeued": count}
+
+@api.post("/failures/retry")
+async def retry_failures(background_tasks: BackgroundTasks) -> dict[str, str]:
+    """Trigger a retry of the failed fetches that are due asynchronously."""
+    async def retry_task() -> None:
+        from app.scraper.scraper import Scraper
+
+        async with Scraper() as scraper:
+            await scraper.retry()
+
+    background_tasks.add_task(retry_task)
+    return {"message": "Retry of failed fetches initiated"}
+
+@api.post("/profile/", response_class=PlainTextResponse)
+async def take_profile(seconds: Annotated[float, Query(gt=0, le=float(PROFILE_MAX_SECONDS))] = 10) -> str:
+    """Sample the stacks of all threads for `seconds` and return them in the folded flamegraph format.
+
+    Requires `PROFILING_ENABLED`. Crawls running in shard processes (`CRAWL_PROCESSES`) are not covered.
+    """
+    if PROFILING_ENABLED.lower() != "true":
+        raise HTTPException(status_code=409, detail="Profiling is disabled (PROFILING_ENABLED)")
+    try:
+        return await asyncio.to_thread(profiler.run, seconds)
+    except ProfilingException as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+@api.get("/profile/loop")
+async def get_loop_report() -> dict:
+    """Report the event loop lag and the time the loop was blocked, by category (parse, db, logging) and coroutine."""
+    if not loop_monitor.running:
+        raise HTTPException(status_code=409, detail="Event loop monitoring is disabled (PROFILING_ENABLED)")
+    return loop_monitor.report()
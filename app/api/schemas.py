@@ -0,0 +1,100 @@
+import os
+from datetime import datetime
+from typing import Self
+
+from pydantic import BaseModel, Field, conint, model_validator
+
+from app.scraper.schemas import CarSchema
+
+LOOKUP_MAX_KEYS = os.getenv("LOOKUP_MAX_KEYS", "5000")
+
+# Car IDs are 32-bit integer primary keys.
+CarId = conint(ge=1, le=2**31 - 1)
+
+
+class DumpSchema(BaseModel):
+    """Schema for the status of a database dump."""
+
+    id: int
+    kind: str
+    status: str
+    path: str | None
+    checksum: str | None
+    size_bytes: int | None
+    rows_count: int | None
+    error: str | None
+    datetime_started: datetime
+    datetime_finished: datetime | None
+
+    class Config:
+        from_attributes = True
+
+
+class FailedFetchSchema(BaseModel):
+    """Schema for a failed fetch waiting for a retry or parked as a dead letter."""
+
+    id: int
+    url: str
+    target: str
+    page: int | None
+    error_class: str
+    error_message: str | None
+    attempts: int
+    status: str
+    datetime_first_failed: datetime
+    datetime_last_failed: datetime
+    datetime_next_attempt: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class RequeueSchema(BaseModel):
+    """Schema for requeueing failed fetches by ID."""
+
+    ids: list[int] = Field(..., min_length=1, max_length=10000)
+
+
+class LookupSchema(BaseModel):
+    """Schema for a bulk car lookup by IDs and/or URLs, with an optional field projection."""
+
+    ids: list[CarId] = Field(default_factory=list, max_length=int(LOOKUP_MAX_KEYS))
+    urls: list[str] = Field(default_factory=list, max_length=int(LOOKUP_MAX_KEYS))
+    fields: list[str] | None = None
+
+    @model_validator(mode="after")
+    def check_keys_and_fields(self) -> Self:
+        """Require between one and `LOOKUP_MAX_KEYS` keys and only known car fields."""
+        keys = len(self.ids) + len(self.urls)
+        if not keys:
+            message = "at least one id or url is required"
+            raise ValueError(message)
+        if keys > int(LOOKUP_MAX_KEYS):
+            message = f"at most {LOOKUP_MAX_KEYS} ids and urls can be looked up at once, got {keys}"
+            raise ValueError(message)
+        unknown = set(self.fields or ()) - {"id", *CarSchema.model_fields}
+        if unknown:
+            message = f"unknown fields: {', '.join(sorted(unknown))}"
+            raise ValueError(message)
+        return self
+
+
+class CarChangeSchema(BaseModel):
+    """Schema for one entry of the car change feed."""
+
+    seq: int
+    cursor: str
+    car_id: int
+    url: str
+    op: str
+    changed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ChangesSchema(BaseModel):
+    """Schema for a page of the car change feed and the `since` cursor to request the next page with."""
+
+    changes: list[CarChangeSchema]
+    next_since: str
@@ -1,3 +1,13 @@
-from app.db.connection import DATABASE_URL, AsyncSessionLocal, Base, get_async_session
+from app.db.connection import (
+    DATABASE_URL,
+    REPLICA_DATABASE_URL,
+    AsyncSessionLocal,
+    Base,
+    ReaderSessionLocal,
+    ReplicaSessionLocal,
+    WriterSessionLocal,
+    dispose_engines,
+    get_async_session,
+)
 
-from .models import Car
+from .models import Car, CarChange, Dump, FailedFetch
@@ -0,0 +1,153 @@
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
+
+import asyncpg
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import CarChange, ReaderSessionLocal, WriterSessionLocal
+from app.db.connection import DATABASE_URL
+
+CHANGES_POLL_INTERVAL = os.getenv("CHANGES_POLL_INTERVAL", "5")
+CHANGES_RETENTION_DAYS = os.getenv("CHANGES_RETENTION_DAYS", "30")
+CHANGES_RECONNECT_AFTER = os.getenv("CHANGES_RECONNECT_AFTER", "30")
+
+# A feed position: `0` for the start of the feed or the `{txid}-{seq}` cursor of a change.
+CURSOR_PATTERN = r"^(0|\d+-\d+)$"
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFeed:
+    """Read and prune the `car_changes` feed filled by the `cars_change_feed` trigger.
+
+    Sequence numbers are assigned when a row is written but become visible when its transaction
+    commits, and a transaction with an older ID may well take a later sequence number. The feed is
+    therefore ordered by transaction ID, then sequence number, and a change is only returned once
+    every transaction with a lower ID has ended. Changes appearing later always sort after the
+    ones already returned, so a consumer that resumes from the last cursor it saw
+    (`CarChange.cursor`) never skips a change committed late.
+
+    Sessions that set `ria.skip_change_feed` to `on`, such as the load test seeder, write no changes.
+    """
+
+    # Transaction IDs below the snapshot's xmin belong to transactions that have ended.
+    VISIBLE = text("car_changes.txid < pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+    @staticmethod
+    async def read(*, since: str = "0", limit: int = 1000) -> list[CarChange]:
+        """Read the changes after the cursor `since`, oldest first, from the primary."""
+        txid, _, seq = since.partition("-")
+        async with ReaderSessionLocal() as session:
+            stmt = (
+                select(CarChange)
+                .where(tuple_(CarChange.txid, CarChange.seq) > tuple_(int(txid), int(seq or 0)), ChangeFeed.VISIBLE)
+                .order_by(CarChange.txid, CarChange.seq)
+                .limit(limit)
+            )
+            result = await session.execute(stmt)
+            return result.scalars().all()
+
+    @staticmethod
+    async def prune() -> int:
+        """Delete the changes older than `CHANGES_RETENTION_DAYS` and return how many were deleted."""
+        async with WriterSessionLocal() as session:
+            stmt = delete(CarChange).where(
+                CarChange.changed_at < func.now() - func.make_interval(0, 0, 0, int(CHANGES_RETENTION_DAYS)),
+            )
+            try:
+                result = await session.execute(stmt)
+                await session.commit()
+            except SQLAlchemyError:
+                await session.rollback()
+                logger.exception("[Changes] Error pruning the change feed")
+                return 0
+            return result.rowcount
+
+
+class ChangeBroadcaster:
+    """Wake up change feed subscribers when the `cars_change_feed` trigger sends a notification.
+
+    One asyncpg connection per process LISTENs on the `car_changes` channel on behalf of all
+    subscribers. Subscribers also wake up every `CHANGES_POLL_INTERVAL` seconds, so they keep
+    receiving changes while the listening connection is down; waiting subscribers reopen it at most
+    every `CHANGES_RECONNECT_AFTER` seconds.
+    """
+
+    CHANNEL = "car_changes"
+
+    def __init__(self, dsn: str = DATABASE_URL) -> None:
+        self.dsn = dsn.replace("postgresql+asyncpg://", "postgresql://")
+        self.poll_interval: float = float(CHANGES_POLL_INTERVAL)
+        self.reconnect_after: float = float(CHANGES_RECONNECT_AFTER)
+        self._connection: asyncpg.Connection | None = None
+        self._subscribers: set[asyncio.Event] = set()
+        self._connect_failed_at: float = float("-inf")
+        self._lock = asyncio.Lock()
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Event]:
+        """Register a subscriber and yield the event set on every notification.
+
+        Clear the event before reading the feed, so that a notification arriving during the read
+        is not lost.
+        """
+        event = asyncio.Event()
+        self._subscribers.add(event)
+        try:
+            await self._listen()
+            yield event
+        finally:
+            self._subscribers.discard(event)
+
+    async def wait(self, event: asyncio.Event) -> bool:
+        """Wait for a notification or the poll interval and return whether a notification arrived."""
+        await self._listen()
+        try:
+            await asyncio.wait_for(event.wait(), self.poll_interval)
+        except TimeoutError:
+            return False
+        return True
+
+    async def close(self) -> None:
+        """Close the listening connection if it is open."""
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            await connection.close()
+
+    async def _listen(self) -> None:
+        if self._connection is not None and not self._connection.is_closed():
+            return
+        if time.monotonic() - self._connect_failed_at < self.reconnect_after:
+            return
+        async with self._lock:
+            if self._connection is not None and not self._connection.is_closed():
+                return
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                await connection.add_listener(self.CHANNEL, self._notify)
+            except (OSError, TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                self._connect_failed_at = time.monotonic()
+                logger.warning(
+                    "[Changes] Cannot listen for change notifications, polling every %.0f seconds", self.poll_interval,
+                )
+                return
+            connection.add_termination_listener(self._terminated)
+            self._connection = connection
+            logger.info("[Changes] Listening for change notifications")
+
+    def _notify(self, _connection: asyncpg.Connection, _pid: int, _channel: str, _payload: str) -> None:
+        for event in self._subscribers:
+            event.set()
+
+    def _terminated(self, connection: asyncpg.Connection) -> None:
+        if self._connection is connection:
+            self._connection = None
+            logger.warning("[Changes] Notification connection lost, polling until a subscriber reconnects")
+
+
+change_broadcaster = ChangeBroadcaster()
@@ -1,6 +1,6 @@
 import os
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 DATABASE_URL = (
@@ -12,13 +12,102 @@ DATABASE_URL = (
     f"{os.getenv('POSTGRES_DB', 'ria_scraper_db')}"
 )
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+REPLICA_DATABASE_URL = (
+    f"postgresql+asyncpg://"
+    f"{os.getenv('POSTGRES_USER', 'postgres_user')}:"
+    f"{os.getenv('POSTGRES_PASSWORD', 'postgres_password')}@"
+    f"{os.getenv('POSTGRES_REPLICA_HOST')}:"
+    f"{os.getenv('POSTGRES_REPLICA_PORT', '5432')}/"
+    f"{os.getenv('POSTGRES_DB', 'ria_scraper_db')}"
+) if os.getenv("POSTGRES_REPLICA_HOST") else None
 
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+
+# Number of processes splitting the configured pool sizes between them, see `share_pools`.
+_pool_processes = 1
+
+
+def share_pools(processes: int) -> None:
+    """Give this process a `1 / processes` share of the configured pool sizes, e.g. in a crawl shard.
+
+    Only pools created afterwards are affected.
+    """
+    global _pool_processes  # noqa: PLW0603
+    _pool_processes = max(processes, 1)
+
+
+def pool_option(role: str, name: str, default: str) -> str:
+    """Return a pool setting for a role, e.g. `DB_WRITER_POOL_SIZE`, falling back to `DB_POOL_SIZE`."""
+    return os.getenv(f"DB_{role}_{name}", os.getenv(f"DB_{name}", default))
+
+
+def pool_limits(role: str) -> tuple[int, int]:
+    """Return this process's share of the `POOL_SIZE` and `MAX_OVERFLOW` settings of a role.
+
+    The SQLAlchemy engine and, with `DB_FAST_PATH`, the asyncpg pool of a role each use these
+    limits, so one process can hold up to `POOL_SIZE + MAX_OVERFLOW` connections per role and pool,
+    plus one for change notifications. Crawl shards split one such budget between them, while the
+    coordinating process keeps its own, so a sharded crawl needs twice the budget of one process
+    below the server's `max_connections` (100 by default).
+    """
+    pool_size = int(pool_option(role, "POOL_SIZE", "5"))
+    max_overflow = int(pool_option(role, "MAX_OVERFLOW", "10"))
+    return max(pool_size // _pool_processes, 1), max_overflow // _pool_processes
+
+
+def pool_options(role: str) -> dict:
+    """Build SQLAlchemy engine pool options for the `WRITER` or `READER` role from the environment."""
+    pool_size, max_overflow = pool_limits(role)
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": float(pool_option(role, "POOL_TIMEOUT", "30")),
+        "pool_recycle": int(pool_option(role, "POOL_RECYCLE", "1800")),
+        "pool_pre_ping": pool_option(role, "POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
+class LazySessionmaker:
+    """Session factory that creates its engine and sessionmaker on first use.
+
+    Importing the application therefore does not build any engine, and processes that never
+    touch a given database role never pay for its pool.
+    """
+
+    def __init__(self, *, url: str, role: str) -> None:
+        self.url = url
+        self.role = role
+        self._sessionmaker: sessionmaker | None = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """Return the engine, creating it on first use."""
+        return self.factory.kw["bind"]
+
+    @property
+    def factory(self) -> sessionmaker:
+        """Return the sessionmaker, creating it on first use."""
+        if self._sessionmaker is None:
+            engine = create_async_engine(self.url, echo=False, **pool_options(self.role))
+            self._sessionmaker = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        return self._sessionmaker
+
+    def __call__(self) -> AsyncSession:
+        """Create a new session."""
+        return self.factory()
+
+    async def dispose(self) -> None:
+        """Dispose of the engine if it was created."""
+        if self._sessionmaker is not None:
+            await self.engine.dispose()
+            self._sessionmaker = None
+
+
+# The scraper writers and the API readers get separate pools so that a crawl
+# cannot starve API requests of connections and vice versa.
+WriterSessionLocal = LazySessionmaker(url=DATABASE_URL, role="WRITER")
+ReaderSessionLocal = LazySessionmaker(url=DATABASE_URL, role="READER")
+ReplicaSessionLocal = LazySessionmaker(url=REPLICA_DATABASE_URL, role="READER") if REPLICA_DATABASE_URL else None
+AsyncSessionLocal = WriterSessionLocal
 
 Base = declarative_base()
 
@@ -26,3 +115,10 @@ async def get_async_session() -> AsyncSession:
     """Yield a SQLAlchemy async session for database operations."""
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def dispose_engines() -> None:
+    """Dispose of all engines that were created."""
+    for sessions in (WriterSessionLocal, ReaderSessionLocal, ReplicaSessionLocal):
+        if sessions is not None:
+            await sessions.dispose()
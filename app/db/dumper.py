@@ -0,0 +1,274 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Literal
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import AsyncSessionLocal, Dump
+
+DUMP_DIR = os.getenv("DUMP_DIR", "dumps")
+DUMP_FORMAT = os.getenv("DUMP_FORMAT", "directory")
+DUMP_JOBS = os.getenv("DUMP_JOBS", "4")
+DUMP_COMPRESSION = os.getenv("DUMP_COMPRESSION", "6")
+DUMP_TABLES = os.getenv("DUMP_TABLES", "")
+DUMP_RETENTION = os.getenv("DUMP_RETENTION", "7")
+DUMP_FULL_WEEKDAY = os.getenv("DUMP_FULL_WEEKDAY", "6")
+
+DumpKind = Literal["full", "incremental"]
+
+logger = logging.getLogger(__name__)
+
+
+class DumpException(Exception):
+    """Exception for handling database dump errors."""
+
+
+class Dumper:
+    """Create, track and rotate database dumps.
+
+    Two kinds of dumps are supported:
+
+    * ``full`` - a ``pg_dump`` of the database (or of ``DUMP_TABLES`` only). The directory
+      format is used by default so that ``pg_dump`` can run ``DUMP_JOBS`` workers in parallel.
+    * ``incremental`` - a gzipped CSV export of the ``cars`` rows changed since the start of
+      the previous successful dump. It is cheap enough to serve as the daily artifact. Start times
+      are taken from the database clock, the same clock that sets ``cars.datetime_updated``.
+
+    Every run is recorded in the ``dumps`` table together with its status and checksum,
+    and only the newest ``DUMP_RETENTION`` successful dumps of each kind are kept on disk.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_EXPIRED = "expired"
+
+    def __init__(self) -> None:
+        self.dump_dir: Path = Path(DUMP_DIR)
+        self.format: str = DUMP_FORMAT
+        self.jobs: int = int(DUMP_JOBS)
+        self.compression: str = DUMP_COMPRESSION
+        self.tables: list[str] = [table.strip() for table in DUMP_TABLES.split(",") if table.strip()]
+        self.retention: int = int(DUMP_RETENTION)
+        self.full_weekday: int = int(DUMP_FULL_WEEKDAY)
+
+    @staticmethod
+    async def read_one(dump_id: int) -> Dump | None:
+        """Read a dump record by its ID."""
+        async with AsyncSessionLocal() as session:
+            return await session.get(Dump, dump_id)
+
+    async def dump(self, kind: DumpKind = "full") -> Dump:
+        """Create a dump record and run the dump to completion."""
+        record = await self.create(kind)
+        return await self.run(record.id)
+
+    async def scheduled_kind(self) -> DumpKind:
+        """Return the kind of dump the nightly job should produce.
+
+        A full dump is taken on ``DUMP_FULL_WEEKDAY`` or when no successful full dump exists yet,
+        an incremental one on all other days.
+        """
+        if datetime.now(UTC).weekday() == self.full_weekday:
+            return "full"
+        async with AsyncSessionLocal() as session:
+            stmt = select(Dump.id).where(Dump.kind == "full", Dump.status == self.STATUS_DONE).limit(1)
+            result = await session.execute(stmt)
+            return "incremental" if result.scalar() else "full"
+
+    @staticmethod
+    async def create(kind: DumpKind) -> Dump:
+        """Register a pending dump and return its record."""
+        async with AsyncSessionLocal() as session:
+            record = Dump(kind=kind, status=Dumper.STATUS_PENDING)
+            session.add(record)
+            await session.commit()
+            return record
+
+    async def run(self, dump_id: int) -> Dump:
+        """Run a previously registered dump and update its record.
+
+        Raises ``DumpException`` if the dump fails, including file system errors; the failure is
+        recorded in the ``dumps`` table first.
+        """
+        async with AsyncSessionLocal() as session:
+            record = await session.get(Dump, dump_id)
+            since = await self._last_successful_start(session) if record.kind == "incremental" else None
+            record.status = self.STATUS_RUNNING
+            record.datetime_started = (await session.execute(select(func.now()))).scalar()
+            await session.commit()
+
+            stamp = record.datetime_started.astimezone(UTC).strftime("%Y%m%d_%H%M%S")
+            path = None
+            try:
+                self.dump_dir.mkdir(parents=True, exist_ok=True)
+                if record.kind == "incremental":
+                    path = self.dump_dir / f"incremental_{stamp}.csv.gz"
+                    record.rows_count = await self._incremental_dump(path, since=since)
+                else:
+                    path = self.dump_dir / (f"dump_{stamp}" if self.format == "directory" else f"dump_{stamp}.sql")
+                    await self._full_dump(path)
+                record.checksum, record.size_bytes = await asyncio.to_thread(self._checksum, path)
+            except (DumpException, OSError) as exc:
+                record.status = self.STATUS_FAILED
+                record.error = str(exc)
+                record.datetime_finished = datetime.now(UTC)
+                await session.commit()
+                if isinstance(exc, DumpException):
+                    raise
+                if path is not None:
+                    await asyncio.to_thread(self._remove, path)
+                message = f"Dump file error: {exc}"
+                raise DumpException(message) from exc
+
+            record.path = str(path)
+            record.status = self.STATUS_DONE
+            record.datetime_finished = datetime.now(UTC)
+            await session.commit()
+            logger.info("[Dumper] %s dump #%s created: %s", record.kind.capitalize(), record.id, path)
+
+        await self.rotate()
+        return record
+
+    async def rotate(self) -> None:
+        """Remove successful dumps beyond the retention limit, keeping the newest ones of each kind."""
+        async with AsyncSessionLocal() as session:
+            for kind in ("full", "incremental"):
+                stmt = (
+                    select(Dump)
+                    .where(Dump.kind == kind, Dump.status == self.STATUS_DONE)
+                    .order_by(Dump.datetime_started.desc())
+                    .offset(self.retention)
+                )
+                result = await session.execute(stmt)
+                for record in result.scalars().all():
+                    try:
+                        await asyncio.to_thread(self._remove, Path(record.path))
+                    except OSError:
+                        logger.exception("[Dumper] Error removing %s dump #%s: %s", kind, record.id, record.path)
+                        continue
+                    record.status = self.STATUS_EXPIRED
+                    logger.info("[Dumper] Rotated out %s dump #%s: %s", kind, record.id, record.path)
+            await session.commit()
+
+    async def _last_successful_start(self, session: AsyncSession) -> datetime | None:
+        stmt = (
+            select(Dump.datetime_started)
+            .where(Dump.status.in_([self.STATUS_DONE, self.STATUS_EXPIRED]))
+            .order_by(Dump.datetime_started.desc())
+            .limit(1)
+        )
+        result = await session.execute(stmt)
+        return result.scalar()
+
+    async def _incremental_dump(self, path: Path, *, since: datetime | None) -> int:
+        """Export rows changed since ``since`` with ``COPY`` and gzip the result.
+
+        When there is no previous dump all rows are exported, which makes the first
+        incremental dump a baseline.
+        """
+        csv_path = path.with_suffix("")
+        query = "SELECT * FROM cars WHERE datetime_updated >= $1 ORDER BY id"
+        since = since or datetime.min.replace(tzinfo=UTC)
+
+        async with AsyncSessionLocal() as session:
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            try:
+                status = await raw_connection.driver_connection.copy_from_query(
+                    query, since, output=str(csv_path), format="csv", header=True,
+                )
+            except Exception as exc:
+                await asyncio.to_thread(csv_path.unlink, missing_ok=True)
+                message = f"Incremental dump error: {exc}"
+                raise DumpException(message) from exc
+
+        await asyncio.to_thread(self._gzip, csv_path, path, self._gzip_level())
+        return int(status.split()[-1])
+
+    async def _full_dump(self, path: Path) -> None:
+        process, stderr = await self._run_dump_subprocess(path)
+        if process.returncode != 0:
+            await asyncio.to_thread(self._remove, path)
+            message = f"Dump error: {stderr.decode()}"
+            raise DumpException(message) from None
+
+    async def _run_dump_subprocess(self, path: Path) -> tuple[asyncio.subprocess.Process, bytes]:
+        """Execute an asynchronous subprocess to create a PostgreSQL database dump using the `pg_dump` utility.
+
+        Connection details are retrieved from the environment variables POSTGRES_USER,
+        POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT and POSTGRES_DB. The directory
+        format is dumped with ``DUMP_JOBS`` parallel workers, the custom format with a
+        single one. The process returns the subprocess information and any standard error output.
+        """
+        env = os.environ.copy()
+        env["PGPASSWORD"] = os.getenv("POSTGRES_PASSWORD")
+
+        args = [
+            "pg_dump",
+            "-U", os.getenv("POSTGRES_USER"),
+            "-h", os.getenv("POSTGRES_HOST"),
+            "-p", os.getenv("POSTGRES_PORT"),
+            "-Z", self.compression,
+            "-b",
+            "-v",
+            "-f", str(path),
+        ]
+        if self.format == "directory":
+            args += ["-F", "d", "-j", str(self.jobs)]
+        else:
+            args += ["-F", "c"]
+        for table in self.tables:
+            args += ["-t", table]
+        args.append(os.getenv("POSTGRES_DB"))
+
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        _, stderr = await process.communicate()
+        return process, stderr
+
+    def _gzip_level(self) -> int:
+        """Return the gzip level from ``DUMP_COMPRESSION``, which may also be given as ``method:level``."""
+        level = self.compression.rpartition(":")[2]
+        return int(level) if level.isdigit() else 6
+
+    @staticmethod
+    def _gzip(source: Path, target: Path, level: int) -> None:
+        with source.open("rb") as src, gzip.open(target, "wb", compresslevel=level) as dst:
+            shutil.copyfileobj(src, dst, length=1024 * 1024)
+        source.unlink()
+
+    @staticmethod
+    def _checksum(path: Path) -> tuple[str, int]:
+        """Return the SHA-256 and size of a dump file or of all files of a directory-format dump."""
+        digest = hashlib.sha256()
+        size = 0
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            if path.is_dir():
+                digest.update(str(file.relative_to(path)).encode())
+            with file.open("rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    digest.update(chunk)
+                    size += len(chunk)
+        return digest.hexdigest(), size
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
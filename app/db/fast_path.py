@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import os
+
+import asyncpg
+
+from app.db.connection import DATABASE_URL, REPLICA_DATABASE_URL, pool_limits, pool_option
+from app.scraper.schemas import CarSchema
+
+DB_FAST_PATH = os.getenv("DB_FAST_PATH", "false").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = os.getenv("DB_STATEMENT_CACHE_SIZE", "100")
+
+logger = logging.getLogger(__name__)
+
+DATA_COLUMNS = [name for name in CarSchema.model_fields if name != "datetime_found"]
+VALIDATOR_COLUMNS = ["http_etag", "http_last_modified"]
+CAR_COLUMNS = [*DATA_COLUMNS, *VALIDATOR_COLUMNS]
+
+
+class FastPath:
+    """Raw asyncpg access for the hot `write_car` upsert and `read_one` lookup.
+
+    The statements are plain SQL strings, so they skip SQLAlchemy statement compilation
+    entirely, and asyncpg keeps them prepared in its per-connection statement cache after
+    the first execution on each pooled connection. The upsert matches `DBManager.write_car`:
+    stored HTTP validators are kept when none were received, and `datetime_updated` only moves
+    when a car field changed.
+
+    The pool reads the same `DB_{ROLE}_*` settings as the SQLAlchemy engines where asyncpg has an
+    equivalent: `POOL_SIZE` and `MAX_OVERFLOW` bound the pool and `POOL_TIMEOUT` bounds the wait
+    for a connection. asyncpg has no connection age limit or pre-ping; it closes connections idle
+    for `MAX_INACTIVE_LIFETIME` seconds and drops broken ones when they are released, so
+    `POOL_RECYCLE` and `POOL_PRE_PING` do not apply.
+    """
+
+    UPSERT_CAR = (
+        f"INSERT INTO cars ({', '.join(CAR_COLUMNS)}, datetime_fetched) "  # noqa: S608
+        f"VALUES ({', '.join(f'${i}' for i in range(1, len(CAR_COLUMNS) + 1))}, now()) "
+        f"ON CONFLICT (url) DO UPDATE SET datetime_fetched = now(), "
+        f"{', '.join(f'{name} = EXCLUDED.{name}' for name in DATA_COLUMNS if name != 'url')}, "
+        f"{', '.join(f'{name} = COALESCE(EXCLUDED.{name}, cars.{name})' for name in VALIDATOR_COLUMNS)}, "
+        f"datetime_updated = CASE WHEN "
+        f"{' OR '.join(f'cars.{name} IS DISTINCT FROM EXCLUDED.{name}' for name in DATA_COLUMNS if name != 'url')} "
+        f"THEN now() ELSE cars.datetime_updated END"
+    )
+    SELECT_CAR = "SELECT * FROM cars WHERE id = $1"
+
+    def __init__(self, *, role: str, dsn: str = DATABASE_URL) -> None:
+        self.role = role
+        self.dsn = dsn.replace("postgresql+asyncpg://", "postgresql://")
+        self.acquire_timeout: float = float(pool_option(role, "POOL_TIMEOUT", "30"))
+        self._pool: asyncpg.Pool | None = None
+        self._lock = asyncio.Lock()
+
+    async def pool(self) -> asyncpg.Pool:
+        """Return the connection pool, creating it on first use."""
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    pool_size, max_overflow = pool_limits(self.role)
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=1,
+                        max_size=pool_size + max_overflow,
+                        max_inactive_connection_lifetime=float(
+                            pool_option(self.role, "MAX_INACTIVE_LIFETIME", "300"),
+                        ),
+                        statement_cache_size=int(DB_STATEMENT_CACHE_SIZE),
+                    )
+        return self._pool
+
+    async def write_car(self, car: dict) -> None:
+        """Insert or update a car record based on the URL."""
+        pool = await self.pool()
+        try:
+            async with pool.acquire(timeout=self.acquire_timeout) as connection:
+                await connection.execute(self.UPSERT_CAR, *(car.get(name) for name in CAR_COLUMNS))
+            logger.info("[DB-Manager] Inserted %s", car["url"])
+        except asyncpg.IntegrityConstraintViolationError as exc:
+            logger.warning("[DB-Manager] Integrity error for car %s: %s", car["url"], exc)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, TimeoutError):
+            logger.exception("[DB-Manager] Error upserting car %s", car["url"])
+
+    async def read_one(self, car_id: int) -> dict | None:
+        """Read a car record by its ID."""
+        pool = await self.pool()
+        async with pool.acquire(timeout=self.acquire_timeout) as connection:
+            record = await connection.fetchrow(self.SELECT_CAR, car_id)
+        return dict(record) if record else None
+
+    async def close(self) -> None:
+        """Close the connection pool if it was created."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+writer_fast_path = FastPath(role="WRITER")
+reader_fast_path = FastPath(role="READER")
+replica_fast_path = FastPath(role="READER", dsn=REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else None
+
+
+async def close_fast_paths() -> None:
+    """Close the writer, reader and replica fast path pools."""
+    await writer_fast_path.close()
+    await reader_fast_path.close()
+    if replica_fast_path is not None:
+        await replica_fast_path.close()
@@ -1,51 +1,166 @@
-import asyncio
+import functools
 import logging
 import os
-from datetime import UTC, datetime
-from pathlib import Path
+from collections.abc import AsyncIterator, Sequence
+from typing import Literal
 
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import Integer, Row, RowMapping, String, any_, bindparam, case, func, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, Insert, insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
-from app.db import AsyncSessionLocal, Car
+from app.db import Car, WriterSessionLocal, fast_path
+from app.db.routing import ReadTarget, replica_router
 from app.scraper.schemas import CarSchema
 
+LOOKUP_CHUNK_SIZE = os.getenv("LOOKUP_CHUNK_SIZE", "500")
+
+# The HTTP validators describe the response rather than the listing, so changing them alone
+# does not count as an update of the car.
+VALIDATOR_COLUMNS = ("http_etag", "http_last_modified")
+
 logger = logging.getLogger(__name__)
 
 class DBManager:
     """Database manager for handling car-related operations."""
 
-    class DumpException(Exception):
-        """Exception for handling database dump errors."""
-
     @staticmethod
-    async def read_one(car_id: int) -> Car | None:
-        """Read a car record by its ID."""
-        async with AsyncSessionLocal() as session:
-            stmt = select(Car).where(Car.id == car_id)
-            result = await session.execute(stmt)
-            return result.scalars().first()
+    async def read_one(car_id: int) -> Car | dict | None:
+        """Read a car record by its ID.
+
+        Reads are served by the read replica when it is usable (see `ReplicaRouter`). With `DB_FAST_PATH`
+        enabled the lookup goes through a cached asyncpg prepared statement and the record is returned as a dict.
+        """
+        async def read(target: ReadTarget) -> Car | dict | None:
+            if fast_path.DB_FAST_PATH:
+                return await target.fast_path.read_one(car_id)
+            async with target.sessions() as session:
+                stmt = select(Car).where(Car.id == car_id)
+                result = await session.execute(stmt)
+                return result.scalars().first()
+
+        return await replica_router.read(read)
 
     @staticmethod
     async def read_list(limit: int = 10, offset: int = 0) -> list[Car] | None:
-        """Read a list of car records."""
-        async with AsyncSessionLocal() as session:
-            stmt = select(Car).limit(limit).offset(offset)
-            result = await session.execute(stmt)
-            return result.scalars().all()
+        """Read a list of car records, from the read replica when it is usable."""
+        async def read(target: ReadTarget) -> list[Car]:
+            async with target.sessions() as session:
+                stmt = select(Car).limit(limit).offset(offset)
+                result = await session.execute(stmt)
+                return result.scalars().all()
+
+        return await replica_router.read(read)
+
+    @staticmethod
+    async def lookup(
+            *, key: Literal["id", "url"], values: Sequence[int | str], columns: Sequence[str],
+    ) -> AsyncIterator[Sequence[RowMapping]]:
+        """Read the given columns of the cars whose `key` is in `values`, yielding one batch per chunk.
+
+        Each chunk of `LOOKUP_CHUNK_SIZE` keys is a single `key = ANY(:keys)` query with the keys bound
+        as one array parameter, so the statement text is the same for every chunk size. Chunks are read
+        from the read replica when it is usable.
+        """
+        key_type = ARRAY(Integer) if key == "id" else ARRAY(String)
+        stmt = (
+            select(*(getattr(Car, name) for name in columns))
+            .where(getattr(Car, key) == any_(bindparam("keys", type_=key_type)))
+        )
+
+        async def read(target: ReadTarget, keys: Sequence[int | str]) -> Sequence[RowMapping]:
+            async with target.sessions() as session:
+                result = await session.execute(stmt, {"keys": list(keys)})
+                return result.mappings().all()
+
+        chunk_size = int(LOOKUP_CHUNK_SIZE)
+        for start in range(0, len(values), chunk_size):
+            yield await replica_router.read(functools.partial(read, keys=values[start:start + chunk_size]))
+
+    @staticmethod
+    async def read_known_urls(urls: list[str]) -> dict[str, Row]:
+        """Return the URL, price, last write and fetch times and HTTP validators of the given URLs already stored."""
+        if not urls:
+            return {}
+        async with WriterSessionLocal() as session:
+            stmt = (
+                select(
+                    Car.url, Car.price_usd, Car.datetime_updated, Car.datetime_fetched,
+                    Car.http_etag, Car.http_last_modified,
+                )
+                .where(Car.url.in_(urls))
+            )
+            try:
+                result = await session.execute(stmt)
+            except SQLAlchemyError:
+                logger.exception("[DB-Manager] Error reading known URLs")
+                return {}
+            return {row.url: row for row in result}
+
+    @staticmethod
+    async def mark_fetched(url: str) -> None:
+        """Record that a car page was fetched unchanged (HTTP 304), without touching `datetime_updated`."""
+        # `datetime_updated` is set to itself so that its `onupdate` default does not apply.
+        stmt = (
+            update(Car)
+            .where(Car.url == url)
+            .values(datetime_fetched=func.now(), datetime_updated=Car.datetime_updated)
+        )
+        async with WriterSessionLocal() as db_session:
+            try:
+                await db_session.execute(stmt)
+                await db_session.commit()
+            except SQLAlchemyError:
+                await db_session.rollback()
+                logger.exception("[DB-Manager] Error recording the fetch of %s", url)
 
     @staticmethod
-    async def write_car(*, data: CarSchema) -> None:
-        """Insert or update a car record based on the URL."""
-        car = data.model_dump(exclude_unset=True)
-        stmt = insert(Car).values(**car)
-        stmt = stmt.on_conflict_do_update(
+    def build_upsert(car: dict, *, fetched: bool = True) -> Insert:
+        """Build the upsert of `DBManager.write_car` for a dict of car columns, including both validators."""
+        fetched_at = {"datetime_fetched": func.now()} if fetched else {}
+        stmt = insert(Car).values(**car, **fetched_at)
+        changed = or_(*(
+            getattr(Car, key).is_distinct_from(stmt.excluded[key])
+            for key in car if key not in ("url", *VALIDATOR_COLUMNS)
+        ))
+        return stmt.on_conflict_do_update(
             index_elements=["url"],
-            set_={key: value for key, value in car.items() if key != "url"},
+            set_={
+                **{key: stmt.excluded[key] for key in car if key not in ("url", *VALIDATOR_COLUMNS)},
+                **{key: func.coalesce(stmt.excluded[key], getattr(Car, key)) for key in VALIDATOR_COLUMNS},
+                "datetime_updated": case((changed, func.now()), else_=Car.datetime_updated),
+                **fetched_at,
+            },
         )
 
-        async with AsyncSessionLocal() as db_session:
+    @staticmethod
+    async def write_car(
+            *,
+            data: CarSchema,
+            exclude: set[str] | None = None,
+            etag: str | None = None,
+            last_modified: str | None = None,
+            fetched: bool = True,
+    ) -> None:
+        """Insert or update a car record based on the URL.
+
+        Fields in `exclude` are neither inserted nor updated, e.g. the phone number when reparsing snapshots.
+        `etag` and `last_modified` are the page's HTTP validators, used for conditional refetches; a stored
+        validator is kept when the response did not carry it, as in `FastPath.UPSERT_CAR`. `datetime_updated` is only moved forward when a car field actually changed, so that incremental
+        dumps only export the listings that changed, while `datetime_fetched` is set on every write of a
+        freshly `fetched` page.
+        """
+        car = {
+            **data.model_dump(exclude_unset=True, exclude=exclude),
+            "http_etag": etag,
+            "http_last_modified": last_modified,
+        }
+        if fast_path.DB_FAST_PATH and not exclude and fetched:
+            await fast_path.writer_fast_path.write_car(car)
+            return
+
+        stmt = DBManager.build_upsert(car, fetched=fetched)
+
+        async with WriterSessionLocal() as db_session:
             try:
                 await db_session.execute(stmt)
                 await db_session.commit()
@@ -56,60 +171,3 @@ class DBManager:
             except SQLAlchemyError:
                 await db_session.rollback()
                 logger.exception("[DB-Manager] Error upserting car %s", car["url"])
-
-    async def dump(self) -> str:
-        """Generate a database dump file and saves it in the "dumps" directory.
-
-        If the dumping process fails, an exception is raised detailing the error.
-        The method relies on a subprocess handling mechanism to create the dump
-        and retrieves the standard error output if there's an issue.
-        """
-        Path("dumps").mkdir(parents=True, exist_ok=True)
-        filename = f"dumps/dump_{datetime.now(UTC).strftime('%Y%m%d_%H%M%S')}.sql"
-        process, stderr = await DBManager._run_dump_subprocess(filename)
-
-        decoded_stderr = stderr.decode()
-        if process.returncode != 0:
-            message = f"Dump error: {decoded_stderr}"
-            raise self.DumpException(message) from None
-        logger.info("[DB-Manager] Database dump created: %s", filename)
-        return filename
-
-    @staticmethod
-    async def _run_dump_subprocess(filename: str) -> tuple[asyncio.subprocess.Process, bytes]:
-        """Execute an asynchronous subprocess to create a PostgreSQL database dump using the `pg_dump` utility.
-
-        This static method handles setting up the
-        necessary environment variables and executing the appropriate command with
-        the provided parameters.
-
-        The database dump is saved to the specified file, with details such as user,
-        host, password, and port being retrieved from the environment variables:
-        POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, and
-        POSTGRES_DB. The process returns the subprocess information and any
-        standard error output.
-        """
-        env = os.environ.copy()
-        env["PGPASSWORD"] = os.getenv("POSTGRES_PASSWORD")
-
-        args = [
-            "pg_dump",
-            "-U", os.getenv("POSTGRES_USER"),
-            "-h", os.getenv("POSTGRES_HOST"),
-            "-p", os.getenv("POSTGRES_PORT"),
-            "-F", "c",
-            "-b",
-            "-v",
-            "-f", filename,
-            os.getenv("POSTGRES_DB"),
-        ]
-
-        process = await asyncio.create_subprocess_exec(
-            *args,
-            env=env,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-        _, stderr = await process.communicate()
-        return process, stderr
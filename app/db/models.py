@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, Numeric, String, func
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, Numeric, String, Text, func
 
 from app.db.connection import Base
 
@@ -20,3 +20,68 @@ class Car(Base):
     car_number = Column(String, nullable=True)
     car_vin = Column(String, nullable=True)
     datetime_found = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    datetime_updated = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True,
+    )
+    http_etag = Column(String, nullable=True)
+    http_last_modified = Column(String, nullable=True)
+    # Last time the page was fetched, whether it changed or not (a 304 response included).
+    datetime_fetched = Column(DateTime(timezone=True), nullable=True)
+
+
+class Dump(Base):
+    """SQLAlchemy model for the 'dumps' table, one row per dump run."""
+
+    __tablename__ = "dumps"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, index=True)
+    path = Column(String, nullable=True)
+    checksum = Column(String, nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    rows_count = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    datetime_started = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    datetime_finished = Column(DateTime(timezone=True), nullable=True)
+
+
+class FailedFetch(Base):
+    """SQLAlchemy model for the 'failed_fetches' table of URLs waiting for a retry or parked as dead letters."""
+
+    __tablename__ = "failed_fetches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String, unique=True, nullable=False, index=True)
+    target = Column(String, nullable=False)
+    page = Column(Integer, nullable=True)
+    error_class = Column(String, nullable=False)
+    error_message = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=1)
+    status = Column(String, nullable=False, index=True)
+    datetime_first_failed = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    datetime_last_failed = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    datetime_next_attempt = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class CarChange(Base):
+    """SQLAlchemy model for the 'car_changes' table, the change feed of 'cars' written by a database trigger.
+
+    `txid` is the ID of the writing transaction. The feed is ordered by `(txid, seq)`, so that
+    changes are only exposed once no change that sorts before them can still be committed.
+    """
+
+    __tablename__ = "car_changes"
+    __table_args__ = (Index("ix_car_changes_txid_seq", "txid", "seq"),)
+
+    seq = Column(BigInteger, primary_key=True)
+    car_id = Column(Integer, nullable=False, index=True)
+    url = Column(String, nullable=False)
+    op = Column(String, nullable=False)
+    txid = Column(BigInteger, nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    @property
+    def cursor(self) -> str:
+        """Return the position of the change in the feed, `{txid}-{seq}`."""
+        return f"{self.txid}-{self.seq}"
@@ -0,0 +1,127 @@
+import logging
+import os
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import FailedFetch, WriterSessionLocal
+
+RETRY_BASE_DELAY = os.getenv("RETRY_BASE_DELAY", "300")
+RETRY_MAX_ATTEMPTS = os.getenv("RETRY_MAX_ATTEMPTS", "5")
+
+logger = logging.getLogger(__name__)
+
+
+class RetryQueue:
+    """Durable retry queue and dead-letter list for failed page fetches.
+
+    A failed URL is retried after `RETRY_BASE_DELAY * 2 ** (attempts - 1)` seconds. After
+    `RETRY_MAX_ATTEMPTS` failed attempts it is parked with the `dead` status until requeued.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_DEAD = "dead"
+
+    @staticmethod
+    async def record_failure(*, url: str, target: str, page: int | None, exc: Exception) -> None:
+        """Record a failed attempt for a URL and schedule its next retry."""
+        cause = exc.__cause__ or exc
+        base_delay = float(RETRY_BASE_DELAY)
+        max_attempts = int(RETRY_MAX_ATTEMPTS)
+
+        stmt = insert(FailedFetch).values(
+            url=url,
+            target=target,
+            page=page,
+            error_class=type(cause).__name__,
+            error_message=str(cause),
+            attempts=1,
+            status=RetryQueue.STATUS_DEAD if max_attempts <= 1 else RetryQueue.STATUS_PENDING,
+            datetime_next_attempt=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, base_delay),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["url"],
+            set_={
+                "error_class": stmt.excluded.error_class,
+                "error_message": stmt.excluded.error_message,
+                "attempts": FailedFetch.attempts + 1,
+                "status": case(
+                    (FailedFetch.attempts + 1 >= max_attempts, RetryQueue.STATUS_DEAD),
+                    else_=RetryQueue.STATUS_PENDING,
+                ),
+                "datetime_last_failed": func.now(),
+                "datetime_next_attempt": func.now() + func.make_interval(
+                    0, 0, 0, 0, 0, 0, base_delay * func.power(2, FailedFetch.attempts),
+                ),
+            },
+        )
+
+        async with WriterSessionLocal() as session:
+            try:
+                await session.execute(stmt)
+                await session.commit()
+            except SQLAlchemyError:
+                await session.rollback()
+                logger.exception("[Retry] Error recording failure for %s", url)
+
+    @staticmethod
+    async def resolve(url: str) -> None:
+        """Remove a URL from the retry queue after a successful fetch."""
+        async with WriterSessionLocal() as session:
+            try:
+                await session.execute(delete(FailedFetch).where(FailedFetch.url == url))
+                await session.commit()
+            except SQLAlchemyError:
+                await session.rollback()
+                logger.exception("[Retry] Error resolving %s", url)
+
+    @staticmethod
+    async def urls() -> set[str]:
+        """Return the URLs of all recorded failures, pending or dead."""
+        async with WriterSessionLocal() as session:
+            try:
+                result = await session.execute(select(FailedFetch.url))
+            except SQLAlchemyError:
+                logger.exception("[Retry] Error reading failed URLs")
+                return set()
+            return set(result.scalars().all())
+
+    @staticmethod
+    async def due(limit: int = 1000) -> list[FailedFetch]:
+        """Return pending failures whose next attempt is due, oldest first."""
+        async with WriterSessionLocal() as session:
+            stmt = (
+                select(FailedFetch)
+                .where(
+                    FailedFetch.status == RetryQueue.STATUS_PENDING,
+                    FailedFetch.datetime_next_attempt <= func.now(),
+                )
+                .order_by(FailedFetch.datetime_next_attempt)
+                .limit(limit)
+            )
+            result = await session.execute(stmt)
+            return result.scalars().all()
+
+    @staticmethod
+    async def read_list(*, status: str | None = None, limit: int = 50, offset: int = 0) -> list[FailedFetch]:
+        """Read a list of recorded failures, optionally filtered by status."""
+        async with WriterSessionLocal() as session:
+            stmt = select(FailedFetch).order_by(FailedFetch.id).limit(limit).offset(offset)
+            if status is not None:
+                stmt = stmt.where(FailedFetch.status == status)
+            result = await session.execute(stmt)
+            return result.scalars().all()
+
+    @staticmethod
+    async def requeue(ids: list[int]) -> int:
+        """Reset the given failures to pending with a fresh attempt count, due immediately."""
+        async with WriterSessionLocal() as session:
+            stmt = (
+                update(FailedFetch)
+                .where(FailedFetch.id.in_(ids))
+                .values(status=RetryQueue.STATUS_PENDING, attempts=0, datetime_next_attempt=func.now())
+            )
+            result = await session.execute(stmt)
+            await session.commit()
+            return result.rowcount
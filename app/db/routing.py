@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from typing import NamedTuple, TypeVar
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.db import ReaderSessionLocal, ReplicaSessionLocal
+from app.db.connection import LazySessionmaker
+from app.db.fast_path import FastPath, reader_fast_path, replica_fast_path
+
+REPLICA_MAX_LAG_SECONDS = os.getenv("REPLICA_MAX_LAG_SECONDS", "30")
+REPLICA_LAG_CHECK_INTERVAL = os.getenv("REPLICA_LAG_CHECK_INTERVAL", "5")
+REPLICA_RETRY_AFTER = os.getenv("REPLICA_RETRY_AFTER", "30")
+
+CONNECTION_ERRORS = (
+    OperationalError, InterfaceError, OSError, TimeoutError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError,
+)
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class ReadTarget(NamedTuple):
+    """A database a read can be served from, through the ORM or the asyncpg fast path."""
+
+    name: str
+    sessions: LazySessionmaker
+    fast_path: FastPath
+
+
+class ReplicaRouter:
+    """Route reads to the read replica while it is reachable and fresh enough.
+
+    The replica lag is checked at most every `REPLICA_LAG_CHECK_INTERVAL` seconds, so reads may be
+    up to `REPLICA_MAX_LAG_SECONDS` plus that interval behind the primary. After a connection error
+    the replica is skipped for `REPLICA_RETRY_AFTER` seconds and reads go to the primary.
+    """
+
+    # A caught-up replica replays everything it received, and an idle primary has no replay
+    # timestamp at all, so both report zero lag instead of the time since the last transaction.
+    LAG_QUERY = text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END",
+    )
+
+    def __init__(self) -> None:
+        self.primary = ReadTarget(name="primary", sessions=ReaderSessionLocal, fast_path=reader_fast_path)
+        self.replica = ReadTarget(
+            name="replica", sessions=ReplicaSessionLocal, fast_path=replica_fast_path,
+        ) if ReplicaSessionLocal else None
+
+        self.max_lag: float = float(REPLICA_MAX_LAG_SECONDS)
+        self.lag_check_interval: float = float(REPLICA_LAG_CHECK_INTERVAL)
+        self.retry_after: float = float(REPLICA_RETRY_AFTER)
+
+        self._lag_ok: bool = False
+        self._lag_checked_at: float = float("-inf")
+        self._unavailable_until: float = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def read(self, func: Callable[[ReadTarget], Awaitable[T]]) -> T:
+        """Run a read on the replica when it is usable, falling back to the primary."""
+        if await self.use_replica():
+            try:
+                return await func(self.replica)
+            except CONNECTION_ERRORS:
+                self.mark_unavailable()
+        return await func(self.primary)
+
+    async def use_replica(self) -> bool:
+        """Return whether the replica is configured, reachable and within the staleness tolerance."""
+        if self.replica is None or time.monotonic() < self._unavailable_until:
+            return False
+        if time.monotonic() - self._lag_checked_at >= self.lag_check_interval:
+            async with self._lock:
+                if time.monotonic() - self._lag_checked_at >= self.lag_check_interval:
+                    await self._check_lag()
+        return self._lag_ok and time.monotonic() >= self._unavailable_until
+
+    def mark_unavailable(self) -> None:
+        """Stop routing reads to the replica for `REPLICA_RETRY_AFTER` seconds."""
+        self._unavailable_until = time.monotonic() + self.retry_after
+        logger.warning("[Router] Replica unavailable, reading from primary for %.0f seconds", self.retry_after)
+
+    async def _check_lag(self) -> None:
+        self._lag_checked_at = time.monotonic()
+        try:
+            async with self.replica.sessions() as session:
+                lag = float((await session.execute(self.LAG_QUERY)).scalar() or 0)
+        except CONNECTION_ERRORS:
+            self._lag_ok = False
+            self.mark_unavailable()
+            return
+
+        lag_ok = lag <= self.max_lag
+        if lag_ok != self._lag_ok:
+            if lag_ok:
+                logger.info("[Router] Replica lag %.1fs is within tolerance, reading from replica", lag)
+            else:
+                logger.warning("[Router] Replica lag %.1fs exceeds %.1fs, reading from primary", lag, self.max_lag)
+        self._lag_ok = lag_ok
+
+
+replica_router = ReplicaRouter()
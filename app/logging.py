@@ -1,15 +1,89 @@
+import atexit
+import json
 import logging
 import logging.config
+import logging.handlers
+import multiprocessing.queues
+import os
+import queue
 import sys
+import threading
+import time
+from datetime import UTC, datetime
+
+LOG_FILE = os.getenv("LOG_FILE", "app.log")
+LOG_MAX_BYTES = os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024))
+LOG_BACKUP_COUNT = os.getenv("LOG_BACKUP_COUNT", "5")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "standard")
+LOG_RATE_LIMIT = os.getenv("LOG_RATE_LIMIT", "0")
+LOG_RATE_INTERVAL = os.getenv("LOG_RATE_INTERVAL", "10")
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the record as JSON."""
+        payload = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """Rate-limit high-volume records below WARNING per message template.
+
+    At most `rate` records sharing the same unformatted message (e.g. `"[Worker-%s] Scraping %s"`)
+    pass per `interval` seconds. The first record after a window with suppressed records carries
+    the number of records dropped in that window. Warnings and errors are never dropped. Records
+    forwarded by worker processes arrive formatted and are keyed on the `template` they carry.
+    """
+
+    def __init__(self, *, rate: int, interval: float) -> None:
+        super().__init__()
+        self.rate = rate
+        self.interval = interval
+        self._windows: dict[tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return whether the record passes the rate limit."""
+        if record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, getattr(record, "template", None) or str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(key, [now, 0, 0])
+            if now - window[0] >= self.interval:
+                suppressed = window[2]
+                window[:] = [now, 0, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} (suppressed {suppressed} similar messages)"
+            window[1] += 1
+            if window[1] > self.rate:
+                window[2] += 1
+                return False
+        return True
 
 
 def setup_logging() -> None:
     """Set up logging configuration.
 
-    Configure logging settings for the application, enabling both console and file outputs
-    with a standardized format. This function sets up loggers with various levels and handlers
-    to customize behavior for specific components of the application (e.g., `sqlalchemy.engine`).
-    The logging configuration is applied using Python's `logging.config.dictConfig`.
+    Configure logging settings for the application, enabling both console and rotating file outputs
+    with a standardized or JSON (`LOG_FORMAT=json`) format. This function sets up loggers with various
+    levels and handlers to customize behavior for specific components of the application (e.g.,
+    `sqlalchemy.engine`). The logging configuration is applied using Python's `logging.config.dictConfig`.
+
+    The `app` logger, which logs on the scraping hot path, only enqueues records; a background
+    `QueueListener` thread formats them and does the console and file I/O.
     """
     logging_config = {
         "version": 1,
@@ -20,20 +94,25 @@ def setup_logging() -> None:
                 "format": "[%(asctime)s] %(levelname)s:     %(message)s",
                 "datefmt": "%Y-%m-%d %H:%M:%S",
             },
+            "json": {
+                "()": JsonFormatter,
+            },
         },
 
         "handlers": {
             "console": {
                 "class": "logging.StreamHandler",
                 "level": "INFO",
-                "formatter": "standard",
+                "formatter": LOG_FORMAT,
                 "stream": sys.stdout,
             },
             "file": {
-                "class": "logging.FileHandler",
+                "class": "logging.handlers.RotatingFileHandler",
                 "level": "INFO",
-                "formatter": "standard",
-                "filename": "app.log",
+                "formatter": LOG_FORMAT,
+                "filename": LOG_FILE,
+                "maxBytes": int(LOG_MAX_BYTES),
+                "backupCount": int(LOG_BACKUP_COUNT),
                 "encoding": "utf-8",
             },
         },
@@ -62,4 +141,92 @@ def setup_logging() -> None:
         },
     }
 
+    shutdown_logging()
     logging.config.dictConfig(logging_config)
+    _install_queue(logging.getLogger("app"))
+
+
+def shutdown_logging() -> None:
+    """Stop the background listener, flushing queued records."""
+    global _listener  # noqa: PLW0603
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread.
+
+    `QueueHandler.prepare` formats every record on the logging thread so that it can be pickled.
+    The queue of `_install_queue` stays within the process, so records are enqueued as they are and
+    the listener's handlers format them. Arguments are therefore rendered when the listener gets to
+    them, which is only a concern for mutable objects changed right after logging them.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Return the record unformatted."""
+        return record
+
+
+class _ForwardingHandler(logging.handlers.QueueHandler):
+    """Queue handler of a worker process that keeps the message template of the records it formats."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Format the record for pickling and keep its unformatted message as `template`."""
+        template = str(record.msg)
+        record = super().prepare(record)
+        record.template = template
+        return record
+
+
+class _ReplayHandler(logging.Handler):
+    """Hand records received from other processes to the local logger of the same name."""
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        """Pass the record to its logger, which applies the local filters and handlers."""
+        logging.getLogger(record.name).handle(record)
+        return True
+
+
+def forward_logging(records: multiprocessing.queues.Queue) -> None:
+    """Send the `app` records of a worker process to its parent through `records`.
+
+    Only the parent writes to the console and the log file, so that processes do not
+    interleave lines or race on file rotation, and rate-limits the records of all workers
+    together by their message template. See `listen_to_workers`.
+    """
+    logger = logging.getLogger("app")
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(_ForwardingHandler(records))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def listen_to_workers(records: multiprocessing.queues.Queue) -> logging.handlers.QueueListener:
+    """Start a listener replaying the records forwarded by worker processes through `records`."""
+    listener = logging.handlers.QueueListener(records, _ReplayHandler())
+    listener.start()
+    return listener
+
+
+def _install_queue(logger: logging.Logger) -> None:
+    """Move the logger's handlers behind a queue served by a background listener thread.
+
+    Records are enqueued unformatted (`_DeferredQueueHandler`), so both formatting and I/O happen
+    in the listener thread.
+    """
+    global _listener  # noqa: PLW0603
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(records)
+    if int(LOG_RATE_LIMIT) > 0:
+        queue_handler.addFilter(RateLimitFilter(rate=int(LOG_RATE_LIMIT), interval=float(LOG_RATE_INTERVAL)))
+
+    _listener = logging.handlers.QueueListener(records, *logger.handlers, respect_handler_level=True)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+    _listener.start()
+
+
+atexit.register(shutdown_logging)
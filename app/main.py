@@ -1,3 +1,4 @@
+import os
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 from typing import Any
@@ -5,17 +6,40 @@ from typing import Any
 from fastapi import FastAPI
 
 from app.api.endpoints import api as endpoints
-from app.logging import setup_logging
-from app.scheduler import scheduler
+from app.db import dispose_engines
+from app.db.changes import change_broadcaster
+from app.db.fast_path import close_fast_paths
+from app.logging import setup_logging, shutdown_logging
+from app.profiling import PROFILING_ENABLED, loop_monitor
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, Any]:
-    """Set up the application lifespan management."""
+    """Set up the application lifespan management.
+
+    The scheduler, and with it the scraper stack, is only loaded when `SCHEDULER_ENABLED` is true,
+    so API-only workers start without it. With `PROFILING_ENABLED` the event loop lag monitor runs
+    for the lifetime of the application.
+    """
     setup_logging()
-    scheduler.start()
+    if PROFILING_ENABLED.lower() == "true":
+        loop_monitor.start()
+    scheduler = None
+    if SCHEDULER_ENABLED.lower() == "true":
+        from app.scheduler import get_scheduler
+
+        scheduler = get_scheduler()
+        scheduler.start()
     yield
-    scheduler.shutdown()
+    if scheduler is not None:
+        scheduler.shutdown()
+    await loop_monitor.stop()
+    await change_broadcaster.close()
+    await close_fast_paths()
+    await dispose_engines()
+    shutdown_logging()
 
 app = FastAPI(
     version="1.0.0",
@@ -0,0 +1,228 @@
+import asyncio
+import contextlib
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from types import FrameType
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false")
+PROFILE_INTERVAL = os.getenv("PROFILE_INTERVAL", "0.01")
+PROFILE_MAX_SECONDS = os.getenv("PROFILE_MAX_SECONDS", "300")
+LOOP_MONITOR_INTERVAL = os.getenv("LOOP_MONITOR_INTERVAL", "0.1")
+LOOP_STALL_THRESHOLD = os.getenv("LOOP_STALL_THRESHOLD", "0.1")
+
+# Blocking code is attributed to the first category, from the innermost frame outwards,
+# whose modules appear on the stack.
+CATEGORIES = (
+    ("logging", ("logging", "app.logging")),
+    ("db", ("sqlalchemy", "asyncpg", "app.db")),
+    ("parse", (
+        "lxml", "parsel", "cssselect", "selectolax", "pydantic",
+        "app.scraper.extraction", "app.scraper.car_data_fetcher", "app.scraper.link_fetcher", "app.scraper.schemas",
+    )),
+)
+MAX_STACKS = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingException(Exception):
+    """Exception raised when a profile cannot be taken."""
+
+
+def frame_label(frame: FrameType) -> str:
+    """Return the `module:qualified_name` label of a frame."""
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+def stack_frames(frame: FrameType) -> list[FrameType]:
+    """Return the frames of a stack, outermost first."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def fold(frames: list[FrameType], root: str | None = None) -> str:
+    """Fold a stack into the `root;outer;...;inner` format of flamegraph tools."""
+    labels = [frame_label(frame) for frame in frames]
+    return ";".join([root, *labels] if root else labels)
+
+
+def classify(frames: list[FrameType]) -> str:
+    """Return `parse`, `db`, `logging` or `other` for the code running on a stack."""
+    for frame in reversed(frames):
+        module = frame.f_globals.get("__name__", "")
+        for category, prefixes in CATEGORIES:
+            if any(module == prefix or module.startswith(f"{prefix}.") for prefix in prefixes):
+                return category
+    return "other"
+
+
+def coroutine_name(frames: list[FrameType]) -> str | None:
+    """Return the name of the innermost coroutine on a stack, i.e. the one that called the blocking code."""
+    for frame in reversed(frames):
+        if frame.f_code.co_flags & inspect.CO_COROUTINE:
+            return frame_label(frame)
+    return None
+
+
+class SamplingProfiler:
+    """Sampling profiler of all threads of the process, for use on a live crawl.
+
+    While it runs, a background thread records the stacks of the other threads every
+    `PROFILE_INTERVAL` seconds through `sys._current_frames`, so the profiled code runs
+    unmodified and the overhead is one stack walk per thread and interval. Only one
+    profile can be taken at a time.
+    """
+
+    def __init__(self) -> None:
+        self.interval: float = float(PROFILE_INTERVAL)
+        self._lock = threading.Lock()
+
+    def run(self, seconds: float) -> str:
+        """Sample for `seconds` and return the stacks in the folded format, one `stack count` line each.
+
+        The root of every stack is the name of its thread. The output can be rendered with
+        `flamegraph.pl` or loaded into speedscope.
+        """
+        if not self._lock.acquire(blocking=False):
+            message = "A profile is already being taken"
+            raise ProfilingException(message)
+        try:
+            own = threading.get_ident()
+            stacks: Counter = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():  # noqa: SLF001
+                    if ident != own:
+                        stacks[fold(stack_frames(frame), root=names.get(ident, str(ident)))] += 1
+                time.sleep(self.interval)
+        finally:
+            self._lock.release()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class LoopMonitor:
+    """Event loop lag monitor naming the code that blocks the loop.
+
+    A heartbeat task sleeps for `LOOP_MONITOR_INTERVAL` seconds at a time and records how late it
+    wakes up. A watchdog thread checks the heartbeat and, while the loop has been blocked for
+    more than `LOOP_STALL_THRESHOLD` seconds, samples the loop thread's stack and attributes the
+    blocked time to the running coroutine and to parsing, database or logging code (`CATEGORIES`).
+    Code holding the GIL for the whole stall, e.g. a long call into a C extension, can only be
+    sampled once it releases it and is reported as `unknown`.
+    """
+
+    def __init__(self) -> None:
+        self.interval: float = float(LOOP_MONITOR_INTERVAL)
+        self.threshold: float = float(LOOP_STALL_THRESHOLD)
+        self.lags: deque[float] = deque(maxlen=1000)
+        self.stalls: int = 0
+        self.blocked_seconds: Counter = Counter()
+        self.culprits: Counter = Counter()
+        self.stacks: Counter = Counter()
+
+        self._heartbeat: float = time.monotonic()
+        self._stall: Counter = Counter()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Return whether the monitor is running."""
+        return self._task is not None
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info("[Loop] Monitoring event loop lag every %.0f ms", self.interval * 1000)
+
+    async def stop(self) -> None:
+        """Stop the heartbeat task and the watchdog thread."""
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        await asyncio.to_thread(self._thread.join)
+        self._task = self._thread = None
+
+    def report(self) -> dict:
+        """Return the lag percentiles of the recent heartbeats and the blocked time by category and coroutine."""
+        lags = sorted(self.lags)
+        with self._lock:
+            culprits = self.culprits.most_common(20)
+            stacks = self.stacks.most_common(20)
+            blocked_seconds = dict(self.blocked_seconds)
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": {
+                "p50": lags[len(lags) // 2] * 1000 if lags else 0.0,
+                "p99": lags[int(len(lags) * 0.99)] * 1000 if lags else 0.0,
+                "max": lags[-1] * 1000 if lags else 0.0,
+            },
+            "stalls": self.stalls,
+            "blocked_seconds": blocked_seconds,
+            "culprits": [
+                {"category": category, "coroutine": coroutine, "seconds": round(seconds, 3)}
+                for (category, coroutine), seconds in culprits
+            ],
+            "stacks": [f"{stack} {count}" for stack, count in stacks],
+        }
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            with self._lock:
+                self._heartbeat = now
+                stall, self._stall = self._stall, Counter()
+            self.lags.append(lag)
+            if lag >= self.threshold:
+                self.stalls += 1
+                (category, coroutine), _ = stall.most_common(1)[0] if stall else (("unknown", None), 0)
+                logger.info("[Loop] Event loop blocked for %.0f ms by %s (%s)", lag * 1000, coroutine, category)
+
+    def _watch(self) -> None:
+        period = self.threshold / 2
+        while not self._stopped.wait(period):
+            with self._lock:
+                blocked = time.monotonic() - self._heartbeat - self.interval
+            if blocked < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)  # noqa: SLF001
+            if frame is None:
+                continue
+            frames = stack_frames(frame)
+            key = (classify(frames), coroutine_name(frames))
+            stack = fold(frames)
+            with self._lock:
+                self._stall[key] += 1
+                self.blocked_seconds[key[0]] += period
+                self.culprits[key] += period
+                if stack in self.stacks or len(self.stacks) < MAX_STACKS:
+                    self.stacks[stack] += 1
+
+
+profiler = SamplingProfiler()
+loop_monitor = LoopMonitor()
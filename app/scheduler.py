@@ -1,16 +1,20 @@
+import functools
 import logging
 import os
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
-from app.db.manager import DBManager
-from app.scraper.scraper import Scraper
+from app.db.changes import ChangeFeed
+from app.db.dumper import Dumper
+from app.scraper.targets import CrawlTarget, load_targets
 
 SCRAPE_HOUR = os.getenv("SCRAPE_HOUR")
 SCRAPE_MINUTE = os.getenv("SCRAPE_MINUTE")
 DUMP_HOUR = os.getenv("DUMP_HOUR")
 DUMP_MINUTE = os.getenv("DUMP_MINUTE")
+RETRY_INTERVAL_MINUTES = os.getenv("RETRY_INTERVAL_MINUTES", "0")
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -20,6 +24,8 @@ class BaseScheduler:
 
     The class initializes an asynchronous scheduler, defines cron-based triggers
     for tasks, and provides methods to start, stop, and execute the tasks on schedule.
+    Crawl targets sharing a schedule are crawled together in one scraper run. Targets are
+    loaded when the scheduler starts and the scraper stack is only imported when a crawl runs.
     """
 
     def __init__(self) -> None:
@@ -31,36 +37,66 @@ class BaseScheduler:
         self.dump_trigger = CronTrigger(
             hour=int(os.getenv("DUMP_HOUR", "2")), minute=int(os.getenv("DUMP_MINUTE", "0")),
         )
-        self.scraper: Scraper = Scraper()
-        self.dumper: DBManager = DBManager()
+        self.retry_trigger = (
+            IntervalTrigger(minutes=int(RETRY_INTERVAL_MINUTES)) if int(RETRY_INTERVAL_MINUTES) > 0 else None
+        )
+        self.targets: list[CrawlTarget] = []
+        self.dumper: Dumper = Dumper()
+
+    async def run_scrape_task(self, targets: list[CrawlTarget]) -> None:
+        """Wrap task for running the scraper over the given targets."""
+        from app.scraper.sharding import run_crawl
+
+        logger.info("Running scrubbing on schedule for %s...", ", ".join(target.name for target in targets))
+        await run_crawl(targets)
+
+    async def run_retry_task(self) -> None:
+        """Wrap task for retrying failed fetches."""
+        from app.scraper.scraper import Scraper
 
-    async def run_scrape_task(self) -> None:
-        """Wrap task for running the scraper."""
-        logger.info("Running scrubbing on schedule...")
-        async with self.scraper as scraper:
-            await scraper.start()
+        logger.info("Retrying failed fetches on schedule...")
+        async with Scraper(targets=self.targets) as scraper:
+            await scraper.retry()
+
+    async def run_prune_changes_task(self) -> None:
+        """Wrap task for pruning old entries of the car change feed."""
+        count = await ChangeFeed.prune()
+        logger.info("Pruned %s entries of the change feed", count)
 
     async def run_dump_task(self) -> None:
         """Wrap task for performing a database dump."""
-        logger.info("Running a database dump on schedule...")
-        await self.dumper.dump()
+        kind = await self.dumper.scheduled_kind()
+        logger.info("Running a %s database dump on schedule...", kind)
+        await self.dumper.dump(kind)
 
     def start(self) -> None:
         """Start the scheduler and add tasks."""
         self.scheduler.start()
+        self.targets = load_targets()
 
-        self.scheduler.add_job(func=self.run_scrape_task, trigger=self.scrape_trigger)
-        self.scheduler.add_job(func=self.run_dump_task, trigger=self.dump_trigger)
+        groups: dict[str | None, list[CrawlTarget]] = {}
+        for target in self.targets:
+            groups.setdefault(target.schedule, []).append(target)
+        for schedule, targets in groups.items():
+            trigger = CronTrigger.from_crontab(schedule) if schedule else self.scrape_trigger
+            scrape_job = self.scheduler.add_job(func=self.run_scrape_task, trigger=trigger, args=[targets])
+            logger.info(
+                "Next scrap run of %s: %s", ", ".join(target.name for target in targets), scrape_job.next_run_time,
+            )
 
-        scrape_job = self.scheduler.get_jobs()[0]
-        dump_job = self.scheduler.get_jobs()[1]
-        logger.info(
-            "Scheduler started. Next scrap run: %s, dump: %s",
-            scrape_job.next_run_time, dump_job.next_run_time,
-        )
+        if self.retry_trigger is not None:
+            retry_job = self.scheduler.add_job(func=self.run_retry_task, trigger=self.retry_trigger)
+            logger.info("Next retry of failed fetches: %s", retry_job.next_run_time)
+
+        self.scheduler.add_job(func=self.run_prune_changes_task, trigger=self.dump_trigger)
+        dump_job = self.scheduler.add_job(func=self.run_dump_task, trigger=self.dump_trigger)
+        logger.info("Scheduler started. Next dump: %s", dump_job.next_run_time)
 
     def shutdown(self) -> None:
         """Close the scheduler."""
         self.scheduler.shutdown()
 
-scheduler = BaseScheduler()
+@functools.cache
+def get_scheduler() -> BaseScheduler:
+    """Return the application scheduler, creating it on first use."""
+    return BaseScheduler()
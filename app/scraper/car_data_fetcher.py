@@ -4,18 +4,23 @@ import os
 import re
 from json import JSONDecodeError
 
-from parsel import Selector
 from pydantic import ValidationError
 
+from app.scraper.extraction import Css, Extractor, FieldSpec, JsonLd, Regex
 from app.scraper.page_fetcher import PageFetcher, RiaException
 from app.scraper.schemas import CarSchema
 
 logger = logging.getLogger(__name__)
 
-PHONE_URL = os.getenv("PHONE_URL")
+PHONE_URL = os.getenv("PHONE_URL", "https://auto.ria.com/bff/final-page/public/auto/popUp/")
+PARSER_BACKEND = os.getenv("PARSER_BACKEND", "lxml")
 
 class CarDataFetcher:
-    """Class for fetching car data from RIA website."""
+    """Class for fetching car data from RIA website.
+
+    The fields are described declaratively in `FIELDS` and extracted by an `Extractor` with the
+    parser backend selected by `PARSER_BACKEND` (`lxml` or, if installed, `selectolax`).
+    """
 
     VIN_PATTERN = re.compile(
         r"\b"
@@ -28,26 +33,73 @@ class CarDataFetcher:
         flags=re.IGNORECASE,
     )
 
-    def __init__(self, page_fetcher: PageFetcher) -> None:
+    # Once all of these have been received the JSON-LD block and the phone request attributes
+    # are available, so the rest of the page may be skipped (see EARLY_TERMINATION).
+    STREAM_MARKERS = (
+        re.compile(rb'<script[^>]*id="ldJson2"[^>]*>.*?</script>', flags=re.DOTALL),
+        re.compile(rb"data-phone-id="),
+        re.compile(rb"data-auto-id="),
+        re.compile(rb"data-owner-id="),
+    )
+
+    FIELDS = (
+        FieldSpec("title", (Css("h1"),), post=str.strip, default=""),
+        FieldSpec("price_usd", (JsonLd(("offers", "price")),)),
+        FieldSpec("odometer", (JsonLd(("mileageFromOdometer", "value")),)),
+        FieldSpec(
+            "username",
+            (
+                Css("section#userInfoBlock div.seller_info_name a"),
+                Regex(re.compile(r'window\.ria\.userName\s*=\s*"([^"]*)";')),
+            ),
+            post=str.strip,
+        ),
+        FieldSpec("image_url", (Regex(re.compile(r'window\.ria\.headPhoto\s*=\s*"([^"]+)"')),)),
+        FieldSpec(
+            "images_count",
+            (Css("img[data-photo-id]", attr="data-photo-id", many=True),),
+            post=lambda ids: len(set(ids)),
+        ),
+        FieldSpec("car_number", (Css("span.state-num.ua"),), post=lambda number: re.sub(r"\s+", "", number)),
+        FieldSpec(
+            "car_vin",
+            (JsonLd(("vehicleIdentificationNumber",)), Regex(VIN_PATTERN, group=0, post=str.upper)),
+        ),
+    )
+
+    # Attributes needed for the phone number request, not stored themselves.
+    PHONE_FIELDS = (
+        FieldSpec("phone_id", (Css("a#openPopupCommentSeller", attr="data-phone-id"),), post=str.strip),
+        FieldSpec("auto_id", (Css("body", attr="data-auto-id"),), post=str.strip),
+        FieldSpec("user_id", (Css("script[data-owner-id]", attr="data-owner-id"),), post=str.strip),
+    )
+
+    def __init__(self, page_fetcher: PageFetcher | None = None, *, backend: str = PARSER_BACKEND) -> None:
         self._page_fetcher = page_fetcher
+        self._extractor = Extractor(self.FIELDS + self.PHONE_FIELDS, backend=backend)
 
     async def parse_car_page(self, *, html_text: str, url: str) -> CarSchema | None:
         """Parse car data from HTML text and return a CarSchema object."""
-        selector: Selector = Selector(text=html_text)
-
-        data = {
-            "url": url,
-            "title": self._get_car_title(selector=selector),
-            "price_usd": self._get_car_price(selector=selector),
-            "odometer": self._get_car_odometer(selector=selector),
-            "username": self._get_username(html_text=html_text),
-            "image_url": self._get_main_image(html_text=html_text),
-            "images_count": self._get_images_count(selector=selector),
-            "car_number": self._get_car_number(selector=selector),
-            "car_vin": self._get_vin(html_text=html_text),
-            "phone_number": await self._get_phone(html_text=html_text, url=url),
-        }
+        data = self.extract(html_text=html_text, url=url, with_phone_ids=True)
+        phone_ids = {field.name: data.pop(field.name) for field in self.PHONE_FIELDS}
+        data["phone_number"] = await self._get_phone(url=url, **phone_ids)
+        return self.validate(data=data, url=url)
+
+    def extract(self, *, html_text: str, url: str, with_phone_ids: bool = False) -> dict:
+        """Extract all car fields that do not need extra requests (everything but the phone number).
+
+        The page is parsed once with the configured backend (`PARSER_BACKEND`). With `with_phone_ids`
+        the attributes needed for the phone number request are included as well.
+        """
+        data = self._extractor.extract(html_text)
+        if not with_phone_ids:
+            for field in self.PHONE_FIELDS:
+                del data[field.name]
+        return {"url": url, **data}
 
+    @staticmethod
+    def validate(*, data: dict, url: str) -> CarSchema | None:
+        """Validate extracted car data, logging and returning None if it is invalid."""
         try:
             car = CarSchema(**data)
         except ValidationError:
@@ -56,101 +108,9 @@ class CarDataFetcher:
         else:
             return car
 
-    @staticmethod
-    def _get_car_title(*, selector: Selector) -> str | None:
-        title = selector.css("h1::text").get()
-        return title.strip() if title else ""
-
-    @staticmethod
-    def _get_car_price(*, selector: Selector) -> str | None:
-        text = selector.css("script#ldJson2::text").get()
-        if not text:
-            return None
-        try:
-            data = json.loads(text)
-            price = data["offers"]["price"]
-        except (JSONDecodeError, KeyError, TypeError):
-            logger.exception("Error parsing JSON for car price")
-            return None
-        else:
-            return price
-
-    @staticmethod
-    def _get_car_odometer(*, selector: Selector) -> str | None:
-        text = selector.css("script#ldJson2::text").get()
-        if not text:
-            return None
-        try:
-            data = json.loads(text)
-            mileage = data.get("mileageFromOdometer")
-            if mileage and "value" in mileage:
-                return mileage["value"]
-        except (JSONDecodeError, KeyError, TypeError):
-            logger.exception("Error parsing JSON for odometer")
-            return None
-        else:
-            return None
-
-    def _get_username(self, *, html_text) -> str | None:
-        selector = Selector(text=html_text)
-        name = selector.css("section#userInfoBlock div.seller_info_name a::text").get()
-        if name:
-            return name.strip()
-        return self._get_username_from_js(html_text)
-
-    @staticmethod
-    def _get_username_from_js(html_text) -> str | None:
-        match = re.search(r'window\.ria\.userName\s*=\s*"([^"]*)";', html_text)
-        if match:
-            return match.group(1)
-        return None
-
-    @staticmethod
-    def _get_main_image(*, html_text) -> str | None:
-        regex = re.compile(r'window\.ria\.headPhoto\s*=\s*"([^"]+)"')
-        match = regex.search(html_text)
-        return match.group(1) if match else None
-
-    @staticmethod
-    def _get_images_count(*, selector: Selector) -> int | None:
-        photo_ids = selector.css("img[data-photo-id]::attr(data-photo-id)").getall()
-        return len(set(photo_ids))
-
-    @staticmethod
-    def _get_car_number(*, selector: Selector) -> str | None:
-        car_number = selector.css("span.state-num.ua::text").get()
-        if car_number:
-            return re.sub(r"\s+", "", car_number.strip())
-        return None
-
-    def _get_vin(self, *, html_text) -> str | None:
-        selector = Selector(text=html_text)
-        text = selector.css("script#ldJson2::text").get()
-        if text:
-            data = json.loads(text)
-            vin = data.get("vehicleIdentificationNumber")
-            if vin is not None:
-                return vin
-
-            vin = self._get_masked_vin(html_text=html_text)
-            if vin is not None:
-                return vin
-        return None
-
-    def _get_masked_vin(self, *, html_text: str) -> str | None:
-        if not html_text:
-            return None
-        matches = self.VIN_PATTERN.findall(html_text)
-        if matches:
-            return matches[0].upper()
-        return None
-
-    async def _get_phone(self, *, html_text, url) -> str | None:
-        selector = Selector(text=html_text)
-        phone_id = self._get_phone_id(selector=selector)
-        auto_id = self._get_auto_id(selector=selector)
-        user_id = self._get_user_id(selector=selector)
-
+    async def _get_phone(
+            self, *, url: str, phone_id: str | None, auto_id: str | None, user_id: str | None,
+    ) -> str | None:
         if all([phone_id, auto_id, user_id]):
             headers = self._page_fetcher.build_phone_headers(url=url)
             payload = self._page_fetcher.build_phone_payload(auto_id=auto_id, user_id=user_id, phone_id=phone_id)
@@ -172,27 +132,6 @@ class CarDataFetcher:
             return self._extract_phone_number(data=data)
         return None
 
-    @staticmethod
-    def _get_phone_id(*, selector: Selector) -> str | None:
-        phone_id = selector.css("a#openPopupCommentSeller::attr(data-phone-id)").get()
-        if phone_id:
-            return phone_id.strip()
-        return None
-
-    @staticmethod
-    def _get_auto_id(*, selector: Selector) -> str | None:
-        auto_id = selector.css("body::attr(data-auto-id)").get()
-        if auto_id:
-            return auto_id.strip()
-        return None
-
-    @staticmethod
-    def _get_user_id(*, selector: Selector) -> str | None:
-        user_id = selector.css("script[data-owner-id]::attr(data-owner-id)").get()
-        if user_id:
-            return user_id.strip()
-        return None
-
     @staticmethod
     def _extract_phone_number(*, data: dict) -> str | None:
         templates = data.get("templates", [])
@@ -0,0 +1,175 @@
+import json
+import logging
+import re
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from json import JSONDecodeError
+from typing import Any, NamedTuple
+
+from lxml import etree
+from parsel import Selector
+from parsel.csstranslator import css2xpath
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+
+class Css(NamedTuple):
+    """Read the first direct text node, or `attr`, of the elements matching a CSS selector.
+
+    With `many` all matching values are returned as a list.
+    """
+
+    selector: str
+    attr: str | None = None
+    many: bool = False
+
+
+class JsonLd(NamedTuple):
+    """Read a value from the page's JSON-LD block (`script#ldJson2`) by its key path."""
+
+    path: tuple[str, ...]
+
+
+class Regex(NamedTuple):
+    """Search the raw HTML with a pattern and read one of its groups, passed through `post` if given."""
+
+    pattern: re.Pattern[str]
+    group: int = 1
+    post: Callable[[str], str] | None = None
+
+
+class FieldSpec(NamedTuple):
+    """Declarative description of how to extract one field.
+
+    The sources are tried in order and the first value that is neither None nor an empty string
+    is passed through `post` (if given). `default` is used when no source yields a value.
+    """
+
+    name: str
+    sources: tuple[Css | JsonLd | Regex, ...]
+    post: Callable[[Any], Any] | None = None
+    default: Any = None
+
+
+class Document(ABC):
+    """A page parsed by a backend, answering CSS queries and the JSON-LD lookup."""
+
+    JSON_LD_SELECTOR = "script#ldJson2"
+
+    def __init__(self, html_text: str) -> None:
+        self.html_text = html_text
+        self._json_ld: dict | None = None
+        self._json_ld_loaded = False
+
+    @abstractmethod
+    def css(self, source: Css) -> str | list[str] | None:
+        """Return the value(s) selected by a CSS source."""
+
+    def json_ld(self) -> dict | None:
+        """Return the decoded JSON-LD block, or None if it is missing or invalid."""
+        if not self._json_ld_loaded:
+            self._json_ld_loaded = True
+            text = self.css(Css(self.JSON_LD_SELECTOR))
+            if text:
+                try:
+                    self._json_ld = json.loads(text)
+                except JSONDecodeError:
+                    logger.exception("Error parsing JSON-LD block")
+        return self._json_ld
+
+
+class LxmlDocument(Document):
+    """Document parsed with parsel/lxml, evaluating CSS selectors compiled to XPath."""
+
+    _compiled: dict[Css, etree.XPath] = {}  # noqa: RUF012
+
+    def __init__(self, html_text: str) -> None:
+        super().__init__(html_text)
+        self._root = Selector(text=html_text).root
+
+    def css(self, source: Css) -> str | list[str] | None:
+        """Return the value(s) selected by a CSS source."""
+        xpath = self._compiled.get(source)
+        if xpath is None:
+            suffix = f"::attr({source.attr})" if source.attr else "::text"
+            xpath = self._compiled[source] = etree.XPath(css2xpath(source.selector + suffix))
+        values = [str(value) for value in xpath(self._root)]
+        if source.many:
+            return values
+        return values[0] if values else None
+
+
+class SelectolaxDocument(Document):
+    """Document parsed with the lexbor engine of selectolax."""
+
+    def __init__(self, html_text: str) -> None:
+        super().__init__(html_text)
+        self._tree = LexborHTMLParser(html_text)
+
+    def css(self, source: Css) -> str | list[str] | None:
+        """Return the value(s) selected by a CSS source."""
+        nodes = self._tree.css(source.selector) if source.many else [self._tree.css_first(source.selector)]
+        values = [value for node in nodes if node is not None and (value := self._value(node, source)) is not None]
+        if source.many:
+            return values
+        return values[0] if values else None
+
+    @staticmethod
+    def _value(node: Any, source: Css) -> str | None:  # noqa: ANN401
+        if source.attr:
+            return node.attributes.get(source.attr)
+        for child in node.iter(include_text=True):
+            if child.tag == "-text":
+                return child.text_content
+        return None
+
+
+BACKENDS: dict[str, type[Document]] = {"lxml": LxmlDocument}
+if LexborHTMLParser is not None:
+    BACKENDS["selectolax"] = SelectolaxDocument
+
+
+class Extractor:
+    """Extract fields described by `FieldSpec`s from HTML with a selected parser backend."""
+
+    def __init__(self, fields: tuple[FieldSpec, ...], *, backend: str = "lxml") -> None:
+        if backend not in BACKENDS:
+            message = f"Unknown or unavailable parser backend {backend!r}, available: {', '.join(BACKENDS)}"
+            raise ValueError(message)
+        self.fields = fields
+        self.backend = backend
+        self._document_class = BACKENDS[backend]
+
+    def extract(self, html_text: str) -> dict[str, Any]:
+        """Parse the HTML once and return the value of every field."""
+        document = self._document_class(html_text)
+        return {field.name: self._extract_field(document, field) for field in self.fields}
+
+    @staticmethod
+    def _extract_field(document: Document, field: FieldSpec) -> Any:  # noqa: ANN401
+        for source in field.sources:
+            value = Extractor._read(document, source)
+            if value is not None and value != "":
+                return field.post(value) if field.post else value
+        return field.default
+
+    @staticmethod
+    def _read(document: Document, source: Css | JsonLd | Regex) -> Any:  # noqa: ANN401
+        if isinstance(source, Css):
+            return document.css(source)
+        if isinstance(source, JsonLd):
+            value = document.json_ld()
+            for key in source.path:
+                if not isinstance(value, dict):
+                    return None
+                value = value.get(key)
+            return value
+        match = source.pattern.search(document.html_text)
+        if match is None:
+            return None
+        return source.post(match.group(source.group)) if source.post else match.group(source.group)
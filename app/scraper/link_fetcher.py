@@ -1,18 +1,101 @@
+import html
 import os
+import re
+from typing import NamedTuple
 
 from parsel import Selector
 
-BASE_URL = os.getenv("BASE_URL")
+BASE_URL = os.getenv("BASE_URL", "https://auto.ria.com")
+
+
+class ListingCard(NamedTuple):
+    """A car card of a search page: its URL, listing ID and displayed USD price."""
+
+    url: str
+    car_id: int | None
+    price_usd: float | None
+
 
 class LinkFetcher:
-    """Class for extracting links from the HTML text."""
+    """Class for extracting links from the HTML text.
+
+    Search pages are scanned with compiled regular expressions for the `div.hide[data-link-to-view]`
+    tags instead of being parsed into a DOM, which is several times faster on the producer path.
+    Comments and the raw text of `<script>`, `<style>`, `<textarea>` and `<title>` elements are
+    removed first, since a DOM parser does not see tags inside them either.
+    `extract_links_with_selector` keeps the DOM-based extraction as the reference implementation.
+    """
+
+    SKIPPED_PATTERN = re.compile(
+        r"<!--.*?(?:-->|\Z)|<(script|style|textarea|title)\b.*?(?:</\1\s*>|\Z)",
+        flags=re.IGNORECASE | re.DOTALL,
+    )
+
+    DIV_PATTERN = re.compile(
+        r"""<div\b(?=[^>]*data-link-to-view)((?:[^>"']|"[^"]*"|'[^']*')*)>""",
+        flags=re.IGNORECASE,
+    )
+    ATTR_PATTERN = re.compile(r"""([^\s"'=/>]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+    PRICE_PATTERN = re.compile(r"""<span\b[^>]*data-currency=["']USD["'][^>]*>([^<]*)<""", flags=re.IGNORECASE)
+    CAR_ID_PATTERN = re.compile(r"_(\d+)\.html")
 
     @staticmethod
     def extract_links(*, html_text: str) -> list[str]:
         """Extract links from the HTML text."""
+        return [card.url for card in LinkFetcher.extract_cards(html_text=html_text)]
+
+    @staticmethod
+    def extract_cards(*, html_text: str) -> list[ListingCard]:
+        """Extract the URL, listing ID and USD price of every car card from the HTML text."""
+        html_text = LinkFetcher.SKIPPED_PATTERN.sub("", html_text)
+        matches = list(LinkFetcher.DIV_PATTERN.finditer(html_text))
+        cards = []
+        for index, match in enumerate(matches):
+            attrs = LinkFetcher._parse_attrs(match.group(1))
+            if "hide" not in attrs.get("class", "").split():
+                continue
+            link = attrs.get("data-link-to-view", "")
+            if "/auto_" not in link:
+                continue
+
+            end = matches[index + 1].start() if index + 1 < len(matches) else len(html_text)
+            price = LinkFetcher.PRICE_PATTERN.search(html_text, match.end(), end)
+            cards.append(ListingCard(
+                url=BASE_URL + link,
+                car_id=LinkFetcher._get_car_id(attrs=attrs, link=link),
+                price_usd=LinkFetcher._parse_price(price.group(1)) if price else None,
+            ))
+        return cards
+
+    @staticmethod
+    def extract_links_with_selector(*, html_text: str) -> list[str]:
+        """Extract links from the HTML text by building a DOM, the reference for `extract_links`."""
         selector = Selector(text=html_text)
         return [
             BASE_URL + div.attrib["data-link-to-view"]
             for div in selector.css("div.hide[data-link-to-view]")
             if "/auto_" in div.attrib.get("data-link-to-view", "")
         ]
+
+    @staticmethod
+    def _parse_attrs(text: str) -> dict[str, str]:
+        attrs = {}
+        for name, double_quoted, single_quoted, unquoted in LinkFetcher.ATTR_PATTERN.findall(text):
+            attrs.setdefault(name.lower(), html.unescape(double_quoted or single_quoted or unquoted))
+        return attrs
+
+    @staticmethod
+    def _get_car_id(*, attrs: dict[str, str], link: str) -> int | None:
+        car_id = attrs.get("data-id", "")
+        if car_id.isdigit():
+            return int(car_id)
+        match = LinkFetcher.CAR_ID_PATTERN.search(link)
+        return int(match.group(1)) if match else None
+
+    @staticmethod
+    def _parse_price(text: str) -> float | None:
+        digits = re.sub(r"[^\d.]", "", html.unescape(text))
+        try:
+            return float(digits)
+        except ValueError:
+            return None
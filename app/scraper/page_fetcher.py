@@ -1,22 +1,87 @@
+import asyncio
 import logging
+import multiprocessing.context
+import os
+import re
 import secrets
-from typing import Literal
+import time
+from typing import Literal, NamedTuple
 
-from aiohttp import ClientResponseError, ClientSession
+from aiohttp import ClientError, ClientResponse, ClientResponseError, ClientSession
 
 from app.scraper.utils import USER_AGENTS
 
+MAX_RESPONSE_BYTES = os.getenv("MAX_RESPONSE_BYTES", str(10 * 1024 * 1024))
+STREAM_CHUNK_SIZE = 64 * 1024
+MARKER_OVERLAP = 64 * 1024
+
 logger = logging.getLogger(__name__)
 
 class RiaException(Exception):
     """Exception raised for errors related to RIA scraper operations."""
 
 
+class FetchResult(NamedTuple):
+    """Result of a fetch: the decoded body (None if not modified) and the response validators.
+
+    `content` holds the body as received if the fetcher keeps it (`keep_content`) and `charset` the
+    encoding it was decoded with. `complete` is False when reading stopped early because all stop
+    markers had been seen.
+    """
+
+    text: str | None
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False
+    complete: bool = True
+    content: bytes | None = None
+    charset: str = "utf-8"
+
+
+class RateBudget:
+    """Token bucket limiting the request rate of all processes of a crawl together.
+
+    The bucket state lives in shared memory guarded by a process-shared lock, so the budget can be
+    handed to worker processes when they start. It refills at `rate` requests per second up to `burst`
+    tokens, and every request takes one token, waiting for the refill when the bucket is empty.
+    """
+
+    def __init__(self, *, rate: float, burst: int, context: multiprocessing.context.BaseContext) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._lock = context.Lock()
+        self._tokens = context.Value("d", float(burst), lock=False)
+        self._updated_at = context.Value("d", time.monotonic(), lock=False)
+
+    async def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens = min(self.burst, self._tokens.value + (now - self._updated_at.value) * self.rate)
+                self._updated_at.value = now
+                if tokens >= 1:
+                    self._tokens.value = tokens - 1
+                    return
+                self._tokens.value = tokens
+            await asyncio.sleep((1 - tokens) / self.rate)
+
+
 class PageFetcher:
-    """Class for fetching web pages using aiohttp sessions, handling GET and POST requests."""
+    """Class for fetching web pages using aiohttp sessions, handling GET and POST requests.
+
+    Bodies are read in chunks and a response larger than `MAX_RESPONSE_BYTES` is rejected
+    instead of being buffered in full. With a `rate_budget`, every request first takes a token from it.
+    With `keep_content`, fetch results carry the undecoded body next to the text, e.g. for snapshots.
+    """
 
-    def __init__(self, *, session: ClientSession) -> None:
+    def __init__(
+            self, *, session: ClientSession, rate_budget: RateBudget | None = None, keep_content: bool = False,
+    ) -> None:
         self._session = session
+        self.rate_budget = rate_budget
+        self.keep_content = keep_content
+        self.max_response_bytes: int = int(MAX_RESPONSE_BYTES)
 
     async def request(
             self,
@@ -27,24 +92,91 @@ class PageFetcher:
             payload: dict | None = None,
     ) -> str | None:
         """Perform a request to the given URL with the given payload and headers."""
+        result = await self.fetch(method=method, url=url, headers=headers, payload=payload)
+        return result.text
+
+    async def fetch(
+            self,
+            *,
+            method: Literal["get", "post"],
+            url: str,
+            headers: dict | None = None,
+            payload: dict | None = None,
+            stop_markers: tuple[re.Pattern[bytes], ...] = (),
+    ) -> FetchResult:
+        """Perform a request and return the body together with its validators.
+
+        A 304 response yields a result with `not_modified` set. Reading stops as soon as every
+        pattern in `stop_markers` has matched the body received so far.
+        """
+        if self.rate_budget is not None:
+            await self.rate_budget.acquire()
         try:
             func = getattr(self._session, method)
             async with func(url=url, headers=headers, json=payload) as response:
                 response.raise_for_status()
-                data: bytes = await response.read()
-                return data.decode(response.charset, errors="ignore")
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if response.status == 304:  # noqa: PLR2004
+                    return FetchResult(text=None, etag=etag, last_modified=last_modified, not_modified=True)
+
+                data, complete = await self._read_body(response, url=url, stop_markers=stop_markers)
+                charset = response.charset or "utf-8"
+                return FetchResult(
+                    text=data.decode(charset, errors="ignore"), etag=etag, last_modified=last_modified,
+                    complete=complete, content=bytes(data) if self.keep_content else None, charset=charset,
+                )
         except ClientResponseError as exc:
             logger.exception(
                 "HTTP error for %s %s: %s %s. Payload: %r. Headers: %r.",
                 method.upper(), url, exc.status, exc.message, payload, headers,
             )
             raise RiaException from exc
+        except (ClientError, TimeoutError) as exc:
+            logger.exception("Request error for %s %s.", method.upper(), url)
+            raise RiaException from exc
+
+    async def _read_body(
+            self, response: ClientResponse, *, url: str, stop_markers: tuple[re.Pattern[bytes], ...],
+    ) -> tuple[bytearray, bool]:
+        """Read the body in chunks, enforcing the size cap and stopping early once all markers are seen."""
+        data = bytearray()
+        remaining = list(stop_markers)
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            start = max(0, len(data) - MARKER_OVERLAP)
+            data += chunk
+            if len(data) > self.max_response_bytes:
+                message = f"Response from {url} exceeds {self.max_response_bytes} bytes"
+                raise RiaException(message)
+            if remaining:
+                window = memoryview(data)[start:]
+                remaining = [marker for marker in remaining if not marker.search(window)]
+                window.release()
+                if not remaining:
+                    return data, False
+        return data, True
 
     async def get(self, *, url: str) -> str:
         """Perform a GET request to the given URL with default headers."""
         headers = self.build_default_headers(url=url)
         return await self.request(method="get", url=url, headers=headers)
 
+    async def get_conditional(
+            self,
+            *,
+            url: str,
+            etag: str | None = None,
+            last_modified: str | None = None,
+            stop_markers: tuple[re.Pattern[bytes], ...] = (),
+    ) -> FetchResult:
+        """Perform a GET request that the server may answer with 304 if the page did not change."""
+        headers = self.build_default_headers(url=url)
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return await self.fetch(method="get", url=url, headers=headers, stop_markers=stop_markers)
+
     async def post(self, *, url: str, headers: dict, payload: dict) -> str:
         """Perform a POST request to the given URL with the given payload and headers."""
         return await self.request(method="post", url=url, headers=headers, payload=payload)
@@ -0,0 +1,73 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.db.manager import DBManager
+from app.logging import forward_logging, listen_to_workers
+from app.scraper.car_data_fetcher import CarDataFetcher
+from app.scraper.snapshots import SnapshotStore
+
+REPARSE_PROCESSES = os.getenv("REPARSE_PROCESSES", str(os.cpu_count() or 1))
+REPARSE_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+# Workers are spawned rather than forked from the API process, whose event loop, scheduler and
+# logging threads do not survive a fork (see `app.scraper.sharding`).
+_context = multiprocessing.get_context("spawn")
+
+
+def extract_snapshot(root: str, url: str, digest: str, charset: str) -> dict | None:
+    """Load a snapshot and extract its car fields; runs in a worker process."""
+    content = SnapshotStore(root=root, max_bytes=0).load(digest)
+    if content is None:
+        return None
+    return CarDataFetcher().extract(html_text=content.decode(charset, errors="ignore"), url=url)
+
+
+class Reparser:
+    """Re-run the extraction pipeline over stored snapshots and upsert the results.
+
+    Extraction runs in a pool of `REPARSE_PROCESSES` spawned processes that forward their logs to
+    this one. A snapshot that cannot be read or parsed is logged and skipped. Phone numbers need a
+    request per car and are not part of the snapshot, so the stored ones are left untouched.
+    """
+
+    def __init__(self, store: SnapshotStore) -> None:
+        self.store = store
+        self.processes: int = int(REPARSE_PROCESSES)
+
+    async def run(self) -> int:
+        """Reparse all snapshots and return the number of cars written."""
+        loop = asyncio.get_running_loop()
+        refs = self.store.refs()
+        records = _context.Queue()
+        listener = listen_to_workers(records)
+        written = failed = 0
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=_context, initializer=forward_logging, initargs=(records,),
+            ) as pool:
+                while batch := await asyncio.to_thread(lambda: list(itertools.islice(refs, REPARSE_BATCH_SIZE))):
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(pool, extract_snapshot, str(self.store.root), url, digest, charset)
+                        for url, digest, charset in batch
+                    ), return_exceptions=True)
+                    for (url, digest, _), data in zip(batch, results, strict=True):
+                        if isinstance(data, Exception):
+                            logger.error("[Reparse] Cannot reparse snapshot %s of %s", digest, url, exc_info=data)
+                            failed += 1
+                            continue
+                        if data is None:
+                            continue
+                        car = CarDataFetcher.validate(data={**data, "phone_number": None}, url=data["url"])
+                        if car is not None:
+                            await DBManager.write_car(data=car, exclude={"phone_number"}, fetched=False)
+                            written += 1
+                    logger.info("[Reparse] %s cars written, %s snapshots failed so far", written, failed)
+        finally:
+            listener.stop()
+        return written
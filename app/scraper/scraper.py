@@ -3,31 +3,66 @@ import functools
 import logging
 import os
 import time
+from collections import Counter
 from collections.abc import Callable, Coroutine
+from datetime import UTC, datetime
 from types import TracebackType
 from typing import Any
 
 from aiohttp import ClientSession, TCPConnector
+from sqlalchemy import Row
 
 from app.db.manager import DBManager
+from app.db.retries import RetryQueue
 from app.scraper.car_data_fetcher import CarDataFetcher
-from app.scraper.link_fetcher import LinkFetcher
-from app.scraper.page_fetcher import PageFetcher, RiaException
+from app.scraper.link_fetcher import LinkFetcher, ListingCard
+from app.scraper.page_fetcher import FetchResult, PageFetcher, RateBudget, RiaException
+from app.scraper.snapshots import SnapshotStore
+from app.scraper.targets import CrawlTarget, load_targets
+from app.scraper.work_queue import LIST_PAGE_PRIORITY, CrawlQueue, CrawlTask, car_priority
 
-DEFAULT_URL = os.getenv("DEFAULT_URL")
-MAX_WORKERS = os.getenv("MAX_WORKERS")
-MAX_CONCURRENT_REQUESTS = os.getenv("MAX_CONCURRENT_REQUESTS")
+MAX_WORKERS = os.getenv("MAX_WORKERS", "40")
+MAX_CONCURRENT_REQUESTS = os.getenv("MAX_CONCURRENT_REQUESTS", "20")
+RETRY_AT_END = os.getenv("RETRY_AT_END", "true")
+EARLY_TERMINATION = os.getenv("EARLY_TERMINATION", "false")
 
 logger = logging.getLogger(__name__)
 
 
 class Scraper:
-    """Asynchronous scraper for collecting car data from RIA website."""
+    """Asynchronous scraper for collecting car data from RIA website.
 
-    def __init__(self) -> None:
-        self.default_url: str = DEFAULT_URL
+    A single crawl covers one or more crawl targets. Their list and car pages share one
+    HTTP session, one request semaphore and one priority queue, and car URLs found by several
+    targets are only fetched once. New listings are fetched before refreshes of known ones.
+
+    Failed fetches are recorded in the retry queue (`RetryQueue`) and retried with backoff,
+    at the end of a crawl (`RETRY_AT_END`) or in a separate `retry` run. A recorded URL that is
+    fetched successfully by any run, retry or not, is removed from the queue.
+
+    A scraper can crawl one of `shards` interleaved slices of the list pages: shard `i` fetches
+    pages `i + 1`, `i + 1 + shards`, and so on (see `app.scraper.sharding`), with a `1 / shards`
+    share of `MAX_CONCURRENT_REQUESTS`. Counts of the work done are kept in `stats`.
+    """
+
+    def __init__(
+            self,
+            targets: list[CrawlTarget] | None = None,
+            max_empty_pages: int = 10,
+            *,
+            shard: int = 0,
+            shards: int = 1,
+            rate_budget: RateBudget | None = None,
+    ) -> None:
+        self.targets: dict[str, CrawlTarget] = {target.name: target for target in targets or load_targets()}
+        self.max_empty_pages: int = max_empty_pages
+        self.shard: int = shard
+        self.shards: int = shards
+        self.rate_budget: RateBudget | None = rate_budget
+        self.retry_at_end: bool = RETRY_AT_END.lower() == "true"
+        self.stats: Counter = Counter()
         self.batch_size: int = 10
-        self.max_concurrent_requests: int = int(MAX_CONCURRENT_REQUESTS)
+        self.max_concurrent_requests: int = max(int(MAX_CONCURRENT_REQUESTS) // shards, 1)
         self.max_workers: int = int(MAX_WORKERS)
 
         self.session: ClientSession | None = None
@@ -35,14 +70,20 @@ class Scraper:
         self.link_fetcher: LinkFetcher | None = None
         self.car_fetcher: CarDataFetcher | None = None
         self.db_manager: DBManager | None = None
+        self.snapshots: SnapshotStore | None = SnapshotStore.from_env()
 
-        self.queue: asyncio.Queue[str] = asyncio.Queue()
+        self.queue: CrawlQueue = CrawlQueue({name: target.priority for name, target in self.targets.items()})
+        self.seen: set[str] = set()
+        self.failed: set[str] = set()
+        self.empty_pages: dict[str, int] = dict.fromkeys(self.targets, 0)
         self.semaphore: asyncio.Semaphore | None = None
 
     async def __aenter__(self) -> "Scraper":
         """Enter the asynchronous context and initialize scraper resources."""
         self.session = ClientSession(connector=TCPConnector(limit=100, limit_per_host=20))
-        self.page_fetcher = PageFetcher(session=self.session)
+        self.page_fetcher = PageFetcher(
+            session=self.session, rate_budget=self.rate_budget, keep_content=self.snapshots is not None,
+        )
         self.link_fetcher = LinkFetcher()
         self.car_fetcher = CarDataFetcher(page_fetcher=self.page_fetcher)
         self.db_manager = DBManager()
@@ -70,63 +111,190 @@ class Scraper:
 
     @async_timed
     async def start(self) -> None:
-        """Start the scraping process by launching producer and worker tasks."""
-        producer = asyncio.create_task(self._producer())
+        """Start the scraping process by seeding the first list page of every target and launching workers."""
+        self.seen.clear()
+        self.failed = await RetryQueue.urls()
+        self.empty_pages = dict.fromkeys(self.targets, 0)
+        for target in self.targets.values():
+            if target.max_pages is not None and self.shard >= target.max_pages:
+                continue
+            self.queue.put_nowait(CrawlTask(
+                target=target.name, url=target.url, page=self.shard + 1, priority=LIST_PAGE_PRIORITY,
+            ))
+
         workers = [
             asyncio.create_task(self._worker(i)) for i in range(self.max_workers)
         ]
 
-        await producer
         await self.queue.join()
+        if self.retry_at_end:
+            await self._enqueue_retries()
+            await self.queue.join()
 
-        producer.cancel()
         [workers.cancel() for workers in workers]
         await asyncio.gather(*workers, return_exceptions=True)
 
-    async def _producer(self, page: int = 1, max_empty_pages: int = 10) -> None:
-        empty_pages = 0
+    @async_timed
+    async def retry(self) -> None:
+        """Reprocess the failed fetches that are due for a retry."""
+        self.failed = await RetryQueue.urls()
+        workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.max_workers)
+        ]
+        await self._enqueue_retries()
+        await self.queue.join()
 
-        while True:
-            url: str = f"{self.default_url}?page={page}"
-            logger.info("[Producer] Scraping page %s: %s", page, url)
+        [workers.cancel() for workers in workers]
+        await asyncio.gather(*workers, return_exceptions=True)
 
-            try:
-                html_text: str = await self.page_fetcher.get(url=url)
-            except RiaException:
-                logger.exception("[Producer] Error fetching list page %s", url)
-                page += 1
+    async def _enqueue_retries(self) -> None:
+        failures = await RetryQueue.due()
+        for failure in failures:
+            if failure.target not in self.targets:
+                logger.warning("[Retry] Skipping %s of unknown target %s", failure.url, failure.target)
                 continue
+            self.seen.add(failure.url)
+            self.queue.put_nowait(CrawlTask(
+                target=failure.target,
+                url=failure.url,
+                page=failure.page,
+                priority=LIST_PAGE_PRIORITY if failure.page is not None else 0.0,
+                retry=True,
+            ))
+        logger.info("[Retry] Enqueued %s failed fetches for retry", len(failures))
+
+    async def _process_list_page(self, task: CrawlTask) -> None:
+        """Fetch a list page, enqueue its unseen car links and the target's next list page."""
+        target = self.targets[task.target]
+        url: str = task.url if task.retry else f"{target.url}?page={task.page}"
+        logger.info("[Producer] Scraping %s page %s: %s", target.name, task.page, url)
+
+        try:
+            html_text: str = await self.page_fetcher.get(url=url)
+        except RiaException as exc:
+            logger.exception("[Producer] Error fetching list page %s", url)
+            await RetryQueue.record_failure(url=url, target=target.name, page=task.page, exc=exc)
+            self.failed.add(url)
+            self.stats["failures"] += 1
+            self._enqueue_next_page(task)
+            return
+        self.stats["list_pages"] += 1
+        await self._resolve(url)
+
+        cards: list[ListingCard] = self.link_fetcher.extract_cards(html_text=html_text)
+        logger.info("[Producer] Founded %s links on page %s: %s", len(cards), task.page, url)
+
+        if not cards:
+            self.empty_pages[target.name] += 1
+            logger.warning(
+                "[Producer] No links on page %s. %s empty pages in a row.", task.page, self.empty_pages[target.name],
+            )
+            if self.empty_pages[target.name] >= self.max_empty_pages:
+                logger.info(
+                    "[Producer] Reached %s empty pages in a row on %s → stopping ...", self.max_empty_pages, target.name,
+                )
+                return
+        else:
+            self.empty_pages[target.name] = 0
+            await self._enqueue_cards(task, [card for card in cards if card.url not in self.seen])
+        self._enqueue_next_page(task)
 
-            links: list[str] = self.link_fetcher.extract_links(html_text=html_text)
-            logger.info("[Producer] Founded %s links on page %s: %s", len(links), page, url)
+    async def _enqueue_cards(self, task: CrawlTask, cards: list[ListingCard]) -> None:
+        """Enqueue car cards of a list page, prioritizing listings that are new or changed their price."""
+        self.seen.update(card.url for card in cards)
+        self.stats["cars_found"] += len(cards)
+        known = await self.db_manager.read_known_urls([card.url for card in cards])
+        now = datetime.now(UTC)
+        for position, card in enumerate(cards):
+            row = known.get(card.url)
+            priority = car_priority(
+                is_new=row is None,
+                changed=self._price_changed(card, row),
+                age_seconds=(now - (row.datetime_fetched or row.datetime_updated)).total_seconds() if row else 0.0,
+                page=task.page,
+                position=position,
+            )
+            self.queue.put_nowait(CrawlTask(
+                target=task.target,
+                url=card.url,
+                priority=priority,
+                etag=row.http_etag if row else None,
+                last_modified=row.http_last_modified if row else None,
+            ))
 
-            if not links:
-                empty_pages += 1
-                logger.warning("[Producer] No links on page %s. %s empty pages in a row.", page, empty_pages)
-                if empty_pages >= max_empty_pages:
-                    logger.info("[Producer] Reached %s empty pages in a row → stopping ...", max_empty_pages)
-                    break
+    @staticmethod
+    def _price_changed(card: ListingCard, row: Row | None) -> bool:
+        if row is None or card.price_usd is None or row.price_usd is None:
+            return False
+        return float(row.price_usd) != card.price_usd
+
+    def _enqueue_next_page(self, task: CrawlTask) -> None:
+        if task.retry:
+            return
+        target = self.targets[task.target]
+        if target.max_pages is not None and task.page + self.shards > target.max_pages:
+            logger.info("[Producer] Reached the page limit of %s on %s → stopping ...", target.max_pages, target.name)
+            return
+        self.queue.put_nowait(task._replace(page=task.page + self.shards))
+
+    async def _process_car_page(self, index: int, task: CrawlTask) -> None:
+        logger.info("[Worker-%s] Scraping %s", index, task.url)
+        try:
+            result = await self.page_fetcher.get_conditional(
+                url=task.url,
+                etag=task.etag,
+                last_modified=task.last_modified,
+                stop_markers=self.car_fetcher.STREAM_MARKERS if EARLY_TERMINATION.lower() == "true" else (),
+            )
+            if result.not_modified:
+                logger.info("[Worker-%s] Not modified %s", index, task.url)
+                self.stats["not_modified"] += 1
+                await self.db_manager.mark_fetched(task.url)
+                data = None
             else:
-                empty_pages = 0
-                for link in links:
-                    await self.queue.put(link)
-            page += 1
+                if self.snapshots is not None and result.complete:
+                    await self._save_snapshot(task.url, result)
+                data = await self.car_fetcher.parse_car_page(url=task.url, html_text=result.text)
+        except RiaException as exc:
+            logger.exception("[Worker-%s] Error fetching %s", index, task.url)
+            await RetryQueue.record_failure(url=task.url, target=task.target, page=None, exc=exc)
+            self.failed.add(task.url)
+            self.stats["failures"] += 1
+        else:
+            self.stats["car_pages"] += 1
+            if data is not None:
+                # A page cut short by EARLY_TERMINATION may lack fields, so its validators are not stored
+                # and the next crawl fetches it in full instead of getting a 304.
+                validators = {"etag": result.etag, "last_modified": result.last_modified} if result.complete else {}
+                await self.db_manager.write_car(data=data, **validators)
+                self.stats["cars_written"] += 1
+            await self._resolve(task.url)
+
+    async def _save_snapshot(self, url: str, result: FetchResult) -> None:
+        """Store the fetched page; a failing snapshot store is logged and does not stop the car from being written."""
+        try:
+            await asyncio.to_thread(self.snapshots.save, url=url, content=result.content, charset=result.charset)
+        except OSError:
+            logger.exception("[Snapshots] Error saving the snapshot of %s", url)
+
+    async def _resolve(self, url: str) -> None:
+        """Remove a successfully fetched URL from the retry queue if a failure is recorded for it."""
+        if url in self.failed:
+            self.failed.discard(url)
+            await RetryQueue.resolve(url)
 
     async def _worker(self, index: int) -> None:
         while True:
             try:
-                url = await self.queue.get()
-                logger.info("[Worker-%s] Scraping %s", index, url)
+                task = await self.queue.get()
             except asyncio.CancelledError:
                 break
 
             async with self.semaphore:
                 try:
-                    html = await self.page_fetcher.get(url=url)
-                    data = await self.car_fetcher.parse_car_page(url=url, html_text=html)
-                except RiaException:
-                    logger.exception("[Worker-%s] Error fetching %s", index, url)
-                else:
-                    await self.db_manager.write_car(data=data)
+                    if task.page is not None:
+                        await self._process_list_page(task)
+                    else:
+                        await self._process_car_page(index, task)
                 finally:
                     self.queue.task_done()
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import multiprocessing
+import multiprocessing.context
+import multiprocessing.queues
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from app.db import dispose_engines
+from app.db.connection import share_pools
+from app.db.fast_path import close_fast_paths
+from app.logging import forward_logging, listen_to_workers
+from app.scraper.page_fetcher import RateBudget
+from app.scraper.scraper import RETRY_AT_END, Scraper
+from app.scraper.targets import CrawlTarget
+
+CRAWL_PROCESSES = os.getenv("CRAWL_PROCESSES", "1")
+CRAWL_RATE_LIMIT = os.getenv("CRAWL_RATE_LIMIT", "0")
+CRAWL_RATE_BURST = os.getenv("CRAWL_RATE_BURST", "10")
+
+logger = logging.getLogger(__name__)
+
+# Shard processes are spawned rather than forked: the parent runs an event loop, the scheduler
+# and logging threads and possibly open database pools, none of which survive a fork.
+_context = multiprocessing.get_context("spawn")
+_rate_budget: RateBudget | None = None
+
+
+def rate_budget(context: multiprocessing.context.BaseContext = _context) -> RateBudget | None:
+    """Create the crawl's rate budget of `CRAWL_RATE_LIMIT` requests per second, or None if unlimited."""
+    rate = float(CRAWL_RATE_LIMIT)
+    return RateBudget(rate=rate, burst=int(CRAWL_RATE_BURST), context=context) if rate > 0 else None
+
+
+def _init_shard(records: multiprocessing.queues.Queue, budget: RateBudget | None, shards: int) -> None:
+    """Forward the logs of a shard process to the coordinator, keep the shared rate budget and split the pools."""
+    global _rate_budget  # noqa: PLW0603
+    forward_logging(records)
+    share_pools(shards)
+    _rate_budget = budget
+
+
+def run_shard(targets: list[CrawlTarget], shard: int, shards: int) -> dict[str, int]:
+    """Crawl one shard of the targets on a new event loop and return its stats; runs in a shard process."""
+    return asyncio.run(_crawl_shard(targets, shard, shards))
+
+
+async def _crawl_shard(targets: list[CrawlTarget], shard: int, shards: int) -> dict[str, int]:
+    try:
+        async with Scraper(targets=targets, shard=shard, shards=shards, rate_budget=_rate_budget) as scraper:
+            scraper.retry_at_end = False
+            start = time.perf_counter()
+            await scraper.start()
+            return {**scraper.stats, "seconds": round(time.perf_counter() - start)}
+    finally:
+        await close_fast_paths()
+        await dispose_engines()
+
+
+class ShardedCrawl:
+    """Crawl targets with several scraper processes, each crawling one shard of the list pages.
+
+    Shard `i` of `n` crawls list pages `i + 1`, `i + 1 + n`, ... of every target, together with the
+    car pages found on them, in its own process with its own event loop, HTTP session, database
+    pools and queue, so parsing and validation scale with the number of cores. The shards split
+    `MAX_CONCURRENT_REQUESTS` and the database pool sizes between them, so together they open
+    about as many requests and connections as a single-process crawl, and all of them share one
+    `RateBudget` of `CRAWL_RATE_LIMIT` requests per second (unlimited if 0). Their logs are
+    forwarded to the coordinator. Failed fetches of all shards are retried by the coordinator once
+    every shard has finished (`RETRY_AT_END`).
+
+    Each shard only deduplicates the car URLs it finds itself: a car listed by several targets on
+    list pages of different shards is fetched once per shard.
+    """
+
+    def __init__(self, targets: list[CrawlTarget], processes: int | None = None) -> None:
+        self.targets = targets
+        self.processes: int = processes or int(CRAWL_PROCESSES)
+
+    async def start(self) -> dict[str, int]:
+        """Run all shards, log their stats and return the stats of the whole crawl."""
+        loop = asyncio.get_running_loop()
+        records = _context.Queue()
+        listener = listen_to_workers(records)
+        budget = rate_budget()
+        start = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=_context, initializer=_init_shard, initargs=(records, budget, self.processes),
+            ) as pool:
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(pool, run_shard, self.targets, shard, self.processes)
+                    for shard in range(self.processes)
+                ), return_exceptions=True)
+        finally:
+            listener.stop()
+
+        summary = Counter()
+        for shard, result in enumerate(results):
+            if isinstance(result, BaseException):
+                logger.error("[Shards] Shard %s/%s failed", shard, self.processes, exc_info=result)
+                summary["failed_shards"] += 1
+                continue
+            logger.info("[Shards] Shard %s/%s: %s", shard, self.processes, result)
+            summary.update({key: value for key, value in result.items() if key != "seconds"})
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "[Shards] Crawled %s with %s processes in %.1f seconds (%.1f pages/s): %s",
+            ", ".join(target.name for target in self.targets), self.processes, elapsed,
+            (summary["list_pages"] + summary["car_pages"]) / elapsed, dict(summary),
+        )
+
+        if RETRY_AT_END.lower() == "true":
+            async with Scraper(targets=self.targets, rate_budget=budget) as scraper:
+                await scraper.retry()
+            summary.update({f"retry_{key}": value for key, value in scraper.stats.items()})
+        return dict(summary)
+
+
+async def run_crawl(targets: list[CrawlTarget]) -> dict[str, int]:
+    """Crawl the targets in this process, or in `CRAWL_PROCESSES` shard processes, and return the crawl stats."""
+    if int(CRAWL_PROCESSES) > 1:
+        return await ShardedCrawl(targets).start()
+    async with Scraper(targets=targets, rate_budget=rate_budget()) as scraper:
+        await scraper.start()
+    return dict(scraper.stats)
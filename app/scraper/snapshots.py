@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
+SNAPSHOT_MAX_BYTES = os.getenv("SNAPSHOT_MAX_BYTES", str(5 * 1024 ** 3))
+SNAPSHOT_COMPRESSION = os.getenv("SNAPSHOT_COMPRESSION", "zstd")
+# Share of the size limit a process may write between two scans of the objects on disk.
+RESCAN_FRACTION = 0.01
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """Content-addressed on-disk store of fetched car page HTML.
+
+    Page bodies are stored once per SHA-256 digest under `objects/`, compressed with zstd when
+    the optional `zstandard` package is installed and with gzip otherwise. `refs/` maps each URL
+    to the digest and charset of its latest snapshot. When the objects exceed `max_bytes` the least
+    recently saved ones are evicted together with the refs pointing to them.
+
+    Several processes can share a store. Each one counts only its own writes and rescans the
+    objects on disk every `RESCAN_FRACTION` of `max_bytes` it has written, so with `n` writing
+    processes the store can exceed its limit by about `n * RESCAN_FRACTION * max_bytes` before
+    one of them evicts.
+
+    The methods do blocking file I/O and are meant to be called through `asyncio.to_thread`.
+    """
+
+    def __init__(self, *, root: str, max_bytes: int, compression: str = "zstd") -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.extension = ".zst" if compression == "zstd" and zstandard is not None else ".gz"
+        self._size: int | None = None
+        self._written = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SnapshotStore | None":
+        """Create a store from SNAPSHOT_* environment variables, or return None if SNAPSHOT_DIR is not set."""
+        if not SNAPSHOT_DIR:
+            return None
+        return cls(root=SNAPSHOT_DIR, max_bytes=int(SNAPSHOT_MAX_BYTES), compression=SNAPSHOT_COMPRESSION)
+
+    def save(self, *, url: str, content: bytes, charset: str = "utf-8") -> str:
+        """Store a page body as received, with the charset to decode it with, for a URL and return its digest."""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if path is not None:
+            path.touch()
+        else:
+            path = self.root / "objects" / digest[:2] / f"{digest}{self.extension}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = self._compress(content)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+            with self._lock:
+                self._written += len(data)
+                if self._size is None or self._written > self.max_bytes * RESCAN_FRACTION:
+                    self._size, self._written = self._total_size(), 0
+                else:
+                    self._size += len(data)
+                if self._size > self.max_bytes:
+                    self._evict()
+
+        ref_path = self._ref_path(url)
+        ref_path.parent.mkdir(parents=True, exist_ok=True)
+        ref_path.write_text(f"{digest}\t{url}\t{charset}", encoding="utf-8")
+        return digest
+
+    def load(self, digest: str) -> bytes | None:
+        """Return the page body stored under a digest, or None if it was evicted."""
+        path = self._object_path(digest)
+        if path is None:
+            return None
+        data = path.read_bytes()
+        if path.suffix == ".zst":
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def refs(self) -> Iterator[tuple[str, str, str]]:
+        """Yield `(url, digest, charset)` for every stored URL."""
+        for _, digest, url, charset in self._read_refs():
+            yield url, digest, charset
+
+    def _compress(self, content: bytes) -> bytes:
+        if self.extension == ".zst":
+            return zstandard.ZstdCompressor(level=10).compress(content)
+        return gzip.compress(content, compresslevel=6)
+
+    def _object_path(self, digest: str) -> Path | None:
+        for extension in (".zst", ".gz"):
+            path = self.root / "objects" / digest[:2] / f"{digest}{extension}"
+            if path.exists():
+                return path
+        return None
+
+    def _ref_path(self, url: str) -> Path:
+        key = hashlib.sha1(url.encode(), usedforsecurity=False).hexdigest()
+        return self.root / "refs" / key[:2] / f"{key}.ref"
+
+    def _read_refs(self) -> Iterator[tuple[Path, str, str, str]]:
+        refs_dir = self.root / "refs"
+        if not refs_dir.exists():
+            return
+        for ref_path in refs_dir.rglob("*.ref"):
+            try:
+                digest, _, rest = ref_path.read_text(encoding="utf-8").partition("\t")
+            except FileNotFoundError:
+                continue
+            url, _, charset = rest.partition("\t")
+            yield ref_path, digest, url, charset or "utf-8"
+
+    def _total_size(self) -> int:
+        return sum(path.stat().st_size for path in (self.root / "objects").rglob("*") if path.is_file())
+
+    def _evict(self) -> None:
+        """Delete the least recently saved objects, and their refs, until the store is at 90% of its size limit."""
+        objects = sorted(
+            ((path.stat(), path) for path in (self.root / "objects").rglob("*") if path.is_file()),
+            key=lambda item: item[0].st_mtime,
+        )
+        target = self.max_bytes * 0.9
+        size = sum(stat.st_size for stat, _ in objects)
+        evicted = set()
+        for stat, path in objects:
+            if size <= target:
+                break
+            path.unlink(missing_ok=True)
+            size -= stat.st_size
+            evicted.add(path.name.partition(".")[0])
+        self._size = size
+        for ref_path, digest, _, _ in self._read_refs():
+            if digest in evicted:
+                ref_path.unlink(missing_ok=True)
+        logger.info("[Snapshots] Evicted %s snapshots, %s bytes left", len(evicted), size)
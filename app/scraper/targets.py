@@ -0,0 +1,31 @@
+import json
+import os
+from pathlib import Path
+
+from pydantic import BaseModel, conint
+
+CRAWL_TARGETS_FILE = os.getenv("CRAWL_TARGETS_FILE")
+DEFAULT_URL = os.getenv("DEFAULT_URL", "https://auto.ria.com/car/used/")
+
+
+class CrawlTarget(BaseModel):
+    """A search URL to crawl, e.g. one brand, region or new versus used segment.
+
+    `priority` is the target's share of the crawl's fetches relative to the other targets,
+    `schedule` a crontab expression overriding the default SCRAPE_HOUR/SCRAPE_MINUTE
+    schedule and `max_pages` a limit on the number of list pages crawled.
+    """
+
+    name: str
+    url: str
+    priority: conint(ge=1) = 1
+    schedule: str | None = None
+    max_pages: conint(ge=1) | None = None
+
+
+def load_targets() -> list[CrawlTarget]:
+    """Load crawl targets from the JSON list in CRAWL_TARGETS_FILE, or a single target for DEFAULT_URL."""
+    if CRAWL_TARGETS_FILE:
+        data = json.loads(Path(CRAWL_TARGETS_FILE).read_text(encoding="utf-8"))
+        return [CrawlTarget(**target) for target in data]
+    return [CrawlTarget(name="default", url=DEFAULT_URL)]
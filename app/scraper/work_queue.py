@@ -0,0 +1,103 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import NamedTuple
+
+QUEUE_AGING_SECONDS = os.getenv("QUEUE_AGING_SECONDS", "3600")
+
+# Car priorities are laid out so that the tier always dominates: `page + position / 100` stays
+# below PAGE_SPAN, refreshes are ordered by age in steps of PAGE_SPAN per day, and the refresh
+# tier starts TIER_GAP above the new listing tier, beyond any page a new listing can have.
+MAX_PAGE = 10_000
+PAGE_SPAN = MAX_PAGE + 1
+MAX_REFRESH_AGE_DAYS = 50
+TIER_GAP = PAGE_SPAN * (MAX_REFRESH_AGE_DAYS + 1)
+
+LIST_PAGE_PRIORITY = -1e9
+NEW_PRIORITY = 0.0
+REFRESH_PRIORITY = float(TIER_GAP)
+
+
+class CrawlTask(NamedTuple):
+    """A unit of crawl work: a list page (`page` is set) or a car page of a crawl target.
+
+    Tasks with a lower `priority` are served first. `retry` marks tasks taken from the retry queue,
+    `etag` and `last_modified` are the stored HTTP validators of a known car page.
+    """
+
+    target: str
+    url: str
+    page: int | None = None
+    priority: float = NEW_PRIORITY
+    retry: bool = False
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+def car_priority(*, is_new: bool, age_seconds: float, page: int, position: int, changed: bool = False) -> float:
+    """Compute the priority of a car page task, lower values being served first.
+
+    The order is that of the tuple `(tier, -age, page, position)`: new listings and known ones that
+    `changed` on the list page (e.g. their price) rank before all plain refreshes of known ones,
+    whatever their page. Among refreshes the longer a listing went without being fetched
+    (`age_seconds` since its last fetch, changed or not, capped at MAX_REFRESH_AGE_DAYS), the sooner
+    it is refreshed. Earlier list pages and positions come next.
+    """
+    order = min(page, MAX_PAGE) + min(position, 99) / 100
+    if is_new or changed:
+        return NEW_PRIORITY + order
+    age_days = min(age_seconds / 86400, MAX_REFRESH_AGE_DAYS)
+    return REFRESH_PRIORITY + (MAX_REFRESH_AGE_DAYS - age_days) * PAGE_SPAN + order
+
+
+class CrawlQueue(asyncio.Queue):
+    """Priority queue interleaving the tasks of several crawl targets in proportion to their priority.
+
+    Each target has its own heap and `get` serves the non-empty one with the lowest pass value,
+    which grows by `1 / priority` on every task served (stride scheduling). A target that was
+    idle restarts from the current pass instead of catching up on the share it did not use.
+
+    Within a target the task with the lowest priority is served first. To protect low-priority
+    tasks from starvation a task's effective priority improves by one tier (`TIER_GAP`) per
+    `QUEUE_AGING_SECONDS` spent waiting. As refreshes span one tier by age, a refresh overtakes
+    new listings enqueued at most `2 * QUEUE_AGING_SECONDS` after it. 0 disables aging. Aging also makes tasks of the same tier that were
+    enqueued seconds apart come out in roughly the order they were enqueued.
+    """
+
+    def __init__(self, priorities: dict[str, int]) -> None:
+        self._priorities = priorities
+        aging_seconds = float(QUEUE_AGING_SECONDS)
+        self._aging_rate = TIER_GAP / aging_seconds if aging_seconds > 0 else 0.0
+        super().__init__()
+
+    def _init(self, _maxsize: int) -> None:
+        self._queues: dict[str, list[tuple[float, int, CrawlTask]]] = {}
+        self._passes: dict[str, float] = {}
+        self._pass: float = 0.0
+        self._size: int = 0
+        self._counter = itertools.count()
+
+    def _qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        """Return True if no target has queued tasks."""
+        return self._size == 0
+
+    def _put(self, item: CrawlTask) -> None:
+        queue = self._queues.setdefault(item.target, [])
+        if not queue:
+            self._passes[item.target] = max(self._passes.get(item.target, 0.0), self._pass)
+        # Ordering by `priority + rate * enqueued_at` is ordering by `priority - rate * waited`.
+        key = item.priority + self._aging_rate * time.monotonic()
+        heapq.heappush(queue, (key, next(self._counter), item))
+        self._size += 1
+
+    def _get(self) -> CrawlTask:
+        target = min((name for name, queue in self._queues.items() if queue), key=self._passes.__getitem__)
+        self._pass = self._passes[target]
+        self._passes[target] += 1 / self._priorities.get(target, 1)
+        self._size -= 1
+        return heapq.heappop(self._queues[target])[2]
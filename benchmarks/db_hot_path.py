@@ -0,0 +1,99 @@
+"""Benchmark the ORM and raw asyncpg paths of `DBManager.write_car` and `DBManager.read_one`.
+
+Runs against the database configured by the POSTGRES_* environment variables. Each path
+inserts its own set of rows with `benchmark://` URLs, updates every one of them once and reads
+them back by ID, so both paths are timed on the same workload. The rows are removed afterwards.
+
+    python -m benchmarks.db_hot_path --rows 5000 --concurrency 40
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from sqlalchemy import delete, select
+
+from app.db import Car, WriterSessionLocal, fast_path
+from app.db.manager import DBManager
+from app.scraper.schemas import CarSchema
+
+URL_PREFIX = "benchmark://"
+
+
+def build_car(label: str, index: int, price_usd: float) -> CarSchema:
+    """Build a synthetic car with a benchmark URL of its path."""
+    return CarSchema(
+        url=f"{URL_PREFIX}{label}/{index}",
+        title=f"Benchmark car {index}",
+        price_usd=price_usd,
+        odometer=index * 10,
+        username="benchmark",
+        phone_number="+380000000000",
+        image_url=None,
+        images_count=0,
+        car_number=None,
+        car_vin=None,
+    )
+
+
+async def run_concurrently(coroutines: list, concurrency: int) -> float:
+    """Await coroutines with bounded concurrency and return the elapsed time in seconds."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(coroutine) -> None:
+        async with semaphore:
+            await coroutine
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded(coroutine) for coroutine in coroutines))
+    return time.perf_counter() - start
+
+
+async def written_ids(label: str) -> list[int]:
+    """Return the IDs of the rows written by one path."""
+    async with WriterSessionLocal() as session:
+        result = await session.execute(select(Car.id).where(Car.url.like(f"{URL_PREFIX}{label}/%")))
+        return list(result.scalars())
+
+
+async def clean() -> None:
+    """Delete all benchmark rows."""
+    async with WriterSessionLocal() as session:
+        await session.execute(delete(Car).where(Car.url.like(f"{URL_PREFIX}%")))
+        await session.commit()
+
+
+async def bench(rows: int, concurrency: int) -> None:
+    """Insert, update and read rows through both paths and print throughput."""
+    await clean()
+    try:
+        for enabled in (False, True):
+            fast_path.DB_FAST_PATH = enabled
+            label = "asyncpg" if enabled else "orm"
+
+            for phase, price in (("insert", 10_000), ("update", 12_000)):
+                cars = [build_car(label, index, price + index) for index in range(rows)]
+                elapsed = await run_concurrently([DBManager.write_car(data=car) for car in cars], concurrency)
+                print(f"{label:8} write_car {phase}: {rows / elapsed:10.1f} ops/s ({elapsed:.2f}s)")
+
+            ids = await written_ids(label)
+            elapsed = await run_concurrently([DBManager.read_one(car_id) for car_id in ids], concurrency)
+            print(f"{label:8} read_one:         {len(ids) / elapsed:10.1f} ops/s ({elapsed:.2f}s)")
+    finally:
+        await clean()
+        await fast_path.close_fast_paths()
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=40)
+    args = parser.parse_args()
+
+    logging.getLogger("app").setLevel(logging.WARNING)
+    asyncio.run(bench(args.rows, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Measure the import time of `app.main` and check it against a startup budget.
+
+Each measurement runs in a fresh interpreter with `-X importtime`. The check fails if the
+median cumulative import time exceeds the budget, or if importing the API pulls in the
+scraper stack (aiohttp, parsel/lxml, the Scraper itself) or creates a database engine.
+
+    python -m benchmarks.import_time --budget-ms 1500 --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SCRAPER_MODULES = ("aiohttp", "parsel", "lxml", "app.scraper.scraper", "app.scraper.car_data_fetcher")
+
+PROBE = (
+    "import sys, app.main, app.db; "
+    f"print(','.join(m for m in {SCRAPER_MODULES!r} if m in sys.modules)); "
+    "print(app.db.WriterSessionLocal._sessionmaker is not None)"
+)
+
+
+def import_time_ms() -> float:
+    """Return the cumulative import time of `app.main` in a fresh interpreter, in milliseconds."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.removeprefix("import time:").split("|")]
+        if len(parts) == 3 and parts[2] == "app.main":  # noqa: PLR2004
+            return int(parts[1]) / 1000
+    message = "app.main not found in -X importtime output"
+    raise RuntimeError(message)
+
+
+def main() -> None:
+    """Parse arguments, measure the import time and check the budget."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    timings = [import_time_ms() for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(f"import app.main: median {median:.1f} ms, min {min(timings):.1f} ms, budget {args.budget_ms:.0f} ms")
+
+    probe = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True,
+    ).stdout.splitlines()
+    loaded, engine_created = probe[0], probe[1] == "True"
+    if loaded:
+        print(f"scraper modules loaded at import: {loaded}")
+    if engine_created:
+        print("a database engine was created at import")
+
+    sys.exit(1 if median > args.budget_ms or loaded or engine_created else 0)
+
+
+if __name__ == "__main__":
+    main()
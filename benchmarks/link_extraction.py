@@ -0,0 +1,56 @@
+"""Check the regex link extractor against the DOM-based one and benchmark both.
+
+Runs over a corpus of saved search pages (`*.html` files in a directory), e.g. pages saved
+from https://auto.ria.com/car/used/?page=N:
+
+    python -m benchmarks.link_extraction path/to/search_pages --repeat 20
+
+Exits with a non-zero status if the extractors disagree on any page.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from app.scraper.link_fetcher import LinkFetcher
+
+
+def timed(func, pages: list[str], repeat: int) -> float:
+    """Return the mean time in milliseconds to run `func` over all pages."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            func(html_text=page)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main() -> None:
+    """Parse arguments, compare the extractors and print timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", type=Path)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    paths = sorted(args.corpus.glob("*.html"))
+    pages = [path.read_text(encoding="utf-8", errors="ignore") for path in paths]
+    if not pages:
+        sys.exit(f"No *.html files in {args.corpus}")
+
+    mismatches = 0
+    for path, page in zip(paths, pages, strict=True):
+        expected = LinkFetcher.extract_links_with_selector(html_text=page)
+        actual = LinkFetcher.extract_links(html_text=page)
+        if actual != expected:
+            mismatches += 1
+            print(f"MISMATCH {path.name}: {len(actual)} links, expected {len(expected)}")
+
+    dom = timed(LinkFetcher.extract_links_with_selector, pages, args.repeat)
+    regex = timed(LinkFetcher.extract_links, pages, args.repeat)
+    print(f"{len(pages)} pages, {mismatches} mismatches")
+    print(f"selector: {dom:8.2f} ms per corpus")
+    print(f"regex:    {regex:8.2f} ms per corpus ({dom / regex:.1f}x)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
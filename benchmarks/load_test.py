@@ -0,0 +1,198 @@
+"""Load-test the read endpoints of a running API and report latency percentiles.
+
+Workers send requests for `--duration` seconds, picking the endpoint of each request from the
+weighted `--mix`. Car ids are drawn from `--id-range` (as printed by `benchmarks.seed_cars`).
+Throughput, error counts and p50/p95/p99 latency are printed per endpoint and saved as JSON to
+`--output-dir`. With `--baseline`, the run fails if an endpoint's p95 latency regressed by more
+than `--tolerance` against a previous result file.
+
+    python -m benchmarks.seed_cars --rows 1000000
+    python -m benchmarks.load_test --concurrency 64 --duration 60 --mix car=8,list=2 --id-range 1-1000000
+    python -m benchmarks.load_test --baseline benchmarks/results/<previous>.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import pathlib
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable
+
+import aiohttp
+
+DEFAULT_OUTPUT_DIR = pathlib.Path(__file__).parent / "results"
+LIST_PAGE_SIZE = 50
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """Parse a request mix such as `car=8,list=2` into endpoint weights."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ENDPOINTS:
+            message = f"unknown endpoint {name!r}, expected one of {', '.join(ENDPOINTS)}"
+            raise argparse.ArgumentTypeError(message)
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def parse_range(value: str) -> tuple[int, int]:
+    """Parse an inclusive id range such as `1-100000`."""
+    first, _, last = value.partition("-")
+    return int(first), int(last)
+
+
+def car_path(rng: random.Random, args: argparse.Namespace) -> str:
+    """Return a `GET /cars/{id}` path for a random id."""
+    return f"/cars/{rng.randint(*args.id_range)}"
+
+
+def list_path(rng: random.Random, args: argparse.Namespace) -> str:
+    """Return a `GET /cars/` path for a random page."""
+    first, last = args.id_range
+    pages = max((last - first + 1) // LIST_PAGE_SIZE, 1)
+    page = rng.randrange(min(pages, args.max_list_page))
+    return f"/cars/?limit={LIST_PAGE_SIZE}&offset={page * LIST_PAGE_SIZE}"
+
+
+ENDPOINTS: dict[str, Callable[[random.Random, argparse.Namespace], str]] = {
+    "car": car_path,
+    "list": list_path,
+}
+
+
+class Recorder:
+    """Collect latencies and status codes per endpoint."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, endpoint: str, status: int | str, elapsed: float) -> None:
+        """Record one request."""
+        self.latencies[endpoint].append(elapsed * 1000)
+        self.statuses[endpoint][str(status)] += 1
+
+    def summary(self, duration: float) -> dict[str, dict]:
+        """Return throughput, status counts and latency percentiles in milliseconds per endpoint."""
+        summary = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            summary[endpoint] = {
+                "requests": len(latencies),
+                "throughput": len(latencies) / duration,
+                "statuses": dict(self.statuses[endpoint]),
+                "p50": percentiles[49],
+                "p95": percentiles[94],
+                "p99": percentiles[98],
+                "max": max(latencies),
+            }
+        return summary
+
+
+async def worker(
+        session: aiohttp.ClientSession, recorder: Recorder, args: argparse.Namespace, deadline: float, seed: int,
+) -> None:
+    """Send requests according to the mix until the deadline."""
+    rng = random.Random(seed)
+    names, weights = list(args.mix), list(args.mix.values())
+    while time.perf_counter() < deadline:
+        endpoint = rng.choices(names, weights)[0]
+        path = ENDPOINTS[endpoint](rng, args)
+        start = time.perf_counter()
+        try:
+            async with session.get(args.base_url + path) as response:
+                await response.read()
+                status = response.status
+        except (aiohttp.ClientError, TimeoutError) as exc:
+            status = type(exc).__name__
+        recorder.record(endpoint, status, time.perf_counter() - start)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Run the warm-up and the measured phase and return the result document."""
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        if args.warmup:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(
+                worker(session, Recorder(), args, deadline, -index) for index in range(args.concurrency)
+            ))
+        recorder = Recorder()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            worker(session, recorder, args, deadline, args.seed + index) for index in range(args.concurrency)
+        ))
+        duration = time.perf_counter() - start
+    return {
+        "datetime": datetime.datetime.now(datetime.UTC).isoformat(),
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+        "duration": duration,
+        "mix": args.mix,
+        "id_range": args.id_range,
+        "endpoints": recorder.summary(duration),
+    }
+
+
+def report(result: dict) -> None:
+    """Print the per-endpoint summary."""
+    print(f"{'endpoint':8} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+    for endpoint, stats in result["endpoints"].items():
+        print(
+            f"{endpoint:8} {stats['requests']:>9} {stats['throughput']:>9.1f} "
+            f"{stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['p99']:>8.1f}  {stats['statuses']}",
+        )
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a description of every endpoint whose p95 latency grew by more than `tolerance`."""
+    found = []
+    for endpoint, stats in result["endpoints"].items():
+        previous = baseline["endpoints"].get(endpoint)
+        if previous and stats["p95"] > previous["p95"] * (1 + tolerance):
+            found.append(f"{endpoint}: p95 {previous['p95']:.1f} ms -> {stats['p95']:.1f} ms")
+    return found
+
+
+def main() -> None:
+    """Parse arguments, run the load test, save the result and compare it with a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before the run")
+    parser.add_argument("--timeout", type=float, default=10, help="per-request timeout in seconds")
+    parser.add_argument("--mix", type=parse_mix, default="car=8,list=2", help="weighted endpoints, e.g. car=8,list=2")
+    parser.add_argument("--id-range", type=parse_range, default="1-100000", help="inclusive car id range")
+    parser.add_argument("--max-list-page", type=int, default=1000, help="deepest list page requested")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", type=pathlib.Path, default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--baseline", type=pathlib.Path, help="previous result file to compare p95 latency with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative p95 regression")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    report(result)
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    path = args.output_dir / f"load_test_{datetime.datetime.now(datetime.UTC):%Y%m%dT%H%M%SZ}.json"
+    path.write_text(json.dumps(result, indent=2))
+    print(f"saved {path}")
+
+    if args.baseline:
+        found = regressions(result, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
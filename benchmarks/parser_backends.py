@@ -0,0 +1,73 @@
+"""Check that all parser backends extract identical car data and benchmark them.
+
+The corpus is either a directory of saved car pages (`*.html`) or the snapshot store:
+
+    python -m benchmarks.parser_backends path/to/car_pages
+    SNAPSHOT_DIR=snapshots python -m benchmarks.parser_backends --snapshots
+
+Exits with a non-zero status if any backend disagrees with `lxml` on any page.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from app.scraper.car_data_fetcher import CarDataFetcher
+from app.scraper.extraction import BACKENDS
+from app.scraper.snapshots import SnapshotStore
+
+
+def load_corpus(args: argparse.Namespace) -> list[tuple[str, str]]:
+    """Return `(url, html)` pairs from the snapshot store or a directory of pages."""
+    if args.snapshots:
+        store = SnapshotStore.from_env()
+        if store is None:
+            sys.exit("SNAPSHOT_DIR is not set")
+        pages = []
+        for url, digest, charset in store.refs():
+            content = store.load(digest)
+            if content is not None:
+                pages.append((url, content.decode(charset, errors="ignore")))
+            if len(pages) >= args.limit:
+                break
+        return pages
+    paths = sorted(args.corpus.glob("*.html"))[:args.limit]
+    return [(path.name, path.read_text(encoding="utf-8", errors="ignore")) for path in paths]
+
+
+def main() -> None:
+    """Parse arguments, compare the backends and print timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", type=Path, nargs="?")
+    parser.add_argument("--snapshots", action="store_true")
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    pages = load_corpus(args)
+    if not pages:
+        sys.exit("Empty corpus")
+
+    results = {}
+    for backend in BACKENDS:
+        fetcher = CarDataFetcher(backend=backend)
+        start = time.perf_counter()
+        results[backend] = [
+            CarDataFetcher.validate(data={**fetcher.extract(html_text=html, url=url), "phone_number": None}, url=url)
+            for url, html in pages
+        ]
+        elapsed = time.perf_counter() - start
+        print(f"{backend:12} {len(pages) / elapsed:10.1f} pages/s")
+
+    mismatches = 0
+    reference = results.pop("lxml")
+    for backend, cars in results.items():
+        for (url, _), expected, actual in zip(pages, reference, cars, strict=True):
+            if expected != actual:
+                mismatches += 1
+                print(f"MISMATCH {backend} {url}:\n  lxml:     {expected}\n  {backend}: {actual}")
+    print(f"{len(pages)} pages, backends: {', '.join(BACKENDS)}, {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
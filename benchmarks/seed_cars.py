@@ -0,0 +1,114 @@
+"""Bulk-load synthetic cars into the database for load tests.
+
+Rows are written with `COPY` through asyncpg in batches and get `loadtest://` URLs, so they can
+be told apart from crawled data and removed with `--clean`. Neither seeding nor cleaning writes to
+the car change feed (`ria.skip_change_feed`). The data is deterministic for a
+given `--seed`: prices, odometers and dates follow skewed distributions, and a share of the
+optional columns is left empty, as on the real site.
+
+    python -m benchmarks.seed_cars --rows 1000000 --batch-size 10000
+    python -m benchmarks.seed_cars --clean
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import time
+
+import asyncpg
+
+from app.db.connection import DATABASE_URL
+
+URL_PREFIX = "loadtest://"
+# Session setting checked by the `cars_change_feed` trigger.
+SKIP_CHANGE_FEED = "SET ria.skip_change_feed = 'on'"
+
+COLUMNS = [
+    "url", "title", "price_usd", "odometer", "username", "phone_number", "image_url",
+    "images_count", "car_number", "car_vin", "datetime_found", "datetime_updated",
+]
+
+MODELS = [
+    "Volkswagen Passat", "Skoda Octavia", "Toyota Camry", "BMW X5", "Renault Megane", "Audi A6",
+    "Ford Focus", "Hyundai Tucson", "Nissan Leaf", "Mercedes-Benz E-Class", "Kia Sportage", "Tesla Model 3",
+]
+REGIONS = ["AA", "AI", "BC", "BH", "AX", "KA", "AE", "BI"]
+VIN_ALPHABET = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+
+
+def build_row(index: int, rng: random.Random, now: datetime.datetime) -> tuple:
+    """Build one synthetic car row in `COLUMNS` order."""
+    year = rng.randint(2000, 2024)
+    found = now - datetime.timedelta(minutes=rng.randint(0, 90 * 24 * 60))
+    images_count = rng.choice([0, *range(1, 40)])
+    return (
+        f"{URL_PREFIX}auto_{index}.html",
+        f"{rng.choice(MODELS)} {year}",
+        round(rng.lognormvariate(9.4, 0.6)) if rng.random() > 0.02 else None,  # noqa: PLR2004
+        rng.randint(0, 400) * 1000 if year < 2024 else 0,  # noqa: PLR2004
+        f"seller_{rng.randint(1, 50_000)}",
+        f"+380{rng.randint(500_000_000, 999_999_999)}" if rng.random() > 0.1 else None,  # noqa: PLR2004
+        f"https://cdn.riastatic.com/photos/{index}.jpg" if images_count else None,
+        images_count,
+        f"{rng.choice(REGIONS)}{rng.randint(1000, 9999)}{rng.choice(REGIONS)}" if rng.random() > 0.4 else None,  # noqa: PLR2004
+        "".join(rng.choices(VIN_ALPHABET, k=17)) if rng.random() > 0.3 else None,  # noqa: PLR2004
+        found,
+        found + datetime.timedelta(minutes=rng.randint(0, int((now - found).total_seconds() // 60))),
+    )
+
+
+async def seed(dsn: str, rows: int, batch_size: int, seed_value: int) -> None:
+    """Copy `rows` synthetic cars into the `cars` table in batches and print the throughput."""
+    rng = random.Random(seed_value)
+    now = datetime.datetime.now(datetime.UTC)
+    connection = await asyncpg.connect(dsn)
+    try:
+        await connection.execute(SKIP_CHANGE_FEED)
+        # Number new rows after the highest index in use; once rows have been deleted, the row
+        # count would hand out URLs that still exist.
+        offset = await connection.fetchval(
+            r"SELECT coalesce(max(substring(url FROM 'auto_(\d+)\.html$')::bigint) + 1, 0) FROM cars WHERE url LIKE $1",
+            f"{URL_PREFIX}%",
+        )
+        start = time.perf_counter()
+        for first in range(offset, offset + rows, batch_size):
+            last = min(first + batch_size, offset + rows)
+            records = [build_row(index, rng, now) for index in range(first, last)]
+            await connection.copy_records_to_table("cars", records=records, columns=COLUMNS)
+            print(f"copied {last - offset:>10} / {rows}", end="\r")
+        elapsed = time.perf_counter() - start
+        await connection.execute("ANALYZE cars")
+        min_id, max_id = await connection.fetchrow(
+            "SELECT min(id), max(id) FROM cars WHERE url LIKE $1", f"{URL_PREFIX}%",
+        )
+    finally:
+        await connection.close()
+    print(f"\ncopied {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s); load test ids {min_id}..{max_id}")
+
+
+async def clean(dsn: str) -> None:
+    """Delete all synthetic cars."""
+    connection = await asyncpg.connect(dsn)
+    try:
+        await connection.execute(SKIP_CHANGE_FEED)
+        status = await connection.execute("DELETE FROM cars WHERE url LIKE $1", f"{URL_PREFIX}%")
+    finally:
+        await connection.close()
+    print(status)
+
+
+def main() -> None:
+    """Parse arguments and seed or clean the database."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clean", action="store_true", help="delete synthetic cars instead of adding them")
+    args = parser.parse_args()
+
+    dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+    asyncio.run(clean(dsn) if args.clean else seed(dsn, args.rows, args.batch_size, args.seed))
+
+
+if __name__ == "__main__":
+    main()
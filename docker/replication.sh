@@ -0,0 +1,4 @@
+#!/bin/bash
+# Allow streaming replication connections so that the db-replica service can pg_basebackup from this instance.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,17 @@
+import pytest
+from pydantic import ValidationError
+
+from app.api.schemas import LOOKUP_MAX_KEYS, LookupSchema
+
+
+@pytest.mark.parametrize("ids", [[0], [-5], [2**31], list(range(1, int(LOOKUP_MAX_KEYS) + 2))])
+def test_lookup_rejects_bad_ids(ids: list[int]) -> None:
+    """IDs outside the integer primary key range and oversized lists fail validation."""
+    with pytest.raises(ValidationError):
+        LookupSchema(ids=ids)
+
+
+def test_lookup_accepts_ids_and_urls() -> None:
+    """A lookup by IDs and URLs within the limits is valid."""
+    body = LookupSchema(ids=[1, 2**31 - 1], urls=["https://auto.ria.com/uk/auto_1.html"], fields=["price_usd"])
+    assert body.ids == [1, 2**31 - 1]
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+
+from app.scraper.car_data_fetcher import CarDataFetcher
+from app.scraper.extraction import BACKENDS, Document
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# The fields extracted from the fixtures by the parser that preceded the declarative `FIELDS`.
+EXPECTED = {
+    "car_page.html": {
+        "url": "https://auto.ria.com/uk/auto_volkswagen_passat_36012345.html",
+        "title": "Volkswagen Passat B8 2016",
+        "price_usd": 15900,
+        "odometer": 187000,
+        "username": "Автохаус Львів",
+        "image_url": "https://cdn0.riastatic.com/photosnew/auto/photo/volkswagen_passat__512345678f.jpg",
+        "images_count": 3,
+        "car_number": "BC1234HI",
+        "car_vin": "WVWZZZ3CZGE012345",
+        "phone_id": "87654321",
+        "auto_id": "36012345",
+        "user_id": "1234567",
+    },
+    "car_page_private.html": {
+        "url": "https://auto.ria.com/uk/auto_skoda_octavia_36054321.html",
+        "title": "Skoda Octavia A7 2018",
+        "price_usd": 13200,
+        "odometer": None,
+        "username": "Ірина",
+        "image_url": None,
+        "images_count": 1,
+        "car_number": None,
+        "car_vin": "TMBAG7NEXJ0XXXX21",
+        "phone_id": "98765432",
+        "auto_id": "36054321",
+        "user_id": "7654321",
+    },
+}
+
+
+@pytest.mark.parametrize("backend", ["lxml", "selectolax"])
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_backends_match_the_previous_parser(backend: str, name: str) -> None:
+    """Every parser backend extracts the same fields as the parser it replaced."""
+    if backend not in BACKENDS:
+        pytest.skip(f"{backend} is not installed")
+    expected = EXPECTED[name]
+    html_text = (FIXTURES / name).read_text(encoding="utf-8")
+    fetcher = CarDataFetcher(backend=backend)
+    assert fetcher.extract(html_text=html_text, url=expected["url"], with_phone_ids=True) == expected
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_json_ld_vin_is_kept_as_published(backend: str) -> None:
+    """Only masked VINs found in the page text are upper-cased."""
+    html_text = '<script id="ldJson2">{"vehicleIdentificationNumber": "wvwZZZ3czge012345"}</script>'
+    data = CarDataFetcher(backend=backend).extract(html_text=html_text, url="https://auto.ria.com/uk/auto_1.html")
+    assert data["car_vin"] == "wvwZZZ3czge012345"
+
+
+def test_document_requires_css() -> None:
+    """A backend without a CSS implementation cannot be instantiated."""
+    with pytest.raises(TypeError):
+        Document("<html></html>")
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import pytest
+
+from app.scraper.link_fetcher import BASE_URL, LinkFetcher, ListingCard
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def read_fixture(name: str) -> str:
+    """Return the text of a saved page from `tests/fixtures`."""
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("name", ["list_page.html", "list_page_empty.html"])
+def test_regex_links_match_the_selector(name: str) -> None:
+    """The regex extractor finds the same links as the DOM-based reference."""
+    html_text = read_fixture(name)
+    assert LinkFetcher.extract_links(html_text=html_text) == LinkFetcher.extract_links_with_selector(
+        html_text=html_text,
+    )
+
+
+def test_links_in_comments_scripts_and_textareas_are_skipped() -> None:
+    """Markup inside comments, scripts and textareas is not mistaken for car cards."""
+    links = LinkFetcher.extract_links(html_text=read_fixture("list_page.html"))
+    for car_id in ("11111111", "22222222", "33333333", "35000001"):
+        assert not any(car_id in link for link in links)
+
+
+def test_cards_carry_their_own_usd_price() -> None:
+    """Each card gets the first USD price before the next card, or None if it has none."""
+    cards = LinkFetcher.extract_cards(html_text=read_fixture("list_page.html"))
+    assert cards == [
+        ListingCard(url=f"{BASE_URL}/uk/auto_volkswagen_passat_36012345.html", car_id=36012345, price_usd=15900.0),
+        ListingCard(url=f"{BASE_URL}/uk/auto_skoda_octavia_36054321.html", car_id=36054321, price_usd=13200.0),
+        ListingCard(
+            url=f"{BASE_URL}/uk/auto_toyota_camry_36077777.html?utm=list&page=1", car_id=36077777, price_usd=None,
+        ),
+        ListingCard(url=f"{BASE_URL}/uk/auto_renault_megane_36099999.html", car_id=36099999, price_usd=7450.0),
+    ]
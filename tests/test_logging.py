@@ -0,0 +1,90 @@
+import logging
+import queue
+import threading
+from collections.abc import Iterator
+
+import pytest
+
+from app.logging import RateLimitFilter, _install_queue, forward_logging, listen_to_workers, shutdown_logging
+
+
+class ListHandler(logging.Handler):
+    """Collect the formatted messages of the records it handles."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Keep the formatted message."""
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def app_logger() -> Iterator[logging.Logger]:
+    """Yield the `app` logger and restore its handlers, level and propagation afterwards."""
+    logger = logging.getLogger("app")
+    handlers, level, propagate = list(logger.handlers), logger.level, logger.propagate
+    yield logger
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    for handler in handlers:
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = propagate
+
+
+def test_forwarded_records_are_rate_limited_per_template(app_logger: logging.Logger) -> None:
+    """Records formatted by a worker are still sampled by their template in the parent."""
+    records: queue.Queue = queue.Queue()
+    forward_logging(records)
+    for index in range(10):
+        logging.getLogger("app.scraper").info("[Worker-%s] Scraping %s", index, f"https://auto.ria.com/auto_{index}.html")
+    forwarded = [records.get_nowait() for _ in range(records.qsize())]
+    assert [record.args for record in forwarded] == [None] * 10
+
+    # The parent side: replay the forwarded records into a rate-limited `app` logger.
+    rate_limit = RateLimitFilter(rate=2, interval=60)
+    collected = ListHandler()
+    collected.addFilter(rate_limit)
+    for handler in list(app_logger.handlers):
+        app_logger.removeHandler(handler)
+    app_logger.addHandler(collected)
+    for record in forwarded:
+        records.put(record)
+    listener = listen_to_workers(records)
+    listener.stop()
+
+    assert collected.messages == [
+        "[Worker-0] Scraping https://auto.ria.com/auto_0.html",
+        "[Worker-1] Scraping https://auto.ria.com/auto_1.html",
+    ]
+    assert list(rate_limit._windows) == [("app.scraper", "[Worker-%s] Scraping %s")]  # noqa: SLF001
+
+
+def test_queued_records_are_formatted_by_the_listener() -> None:
+    """The logging thread only enqueues records; their arguments are rendered in the listener thread."""
+
+    class Probe:
+        def __init__(self) -> None:
+            self.threads: list[str] = []
+
+        def __str__(self) -> str:
+            self.threads.append(threading.current_thread().name)
+            return "probe"
+
+    logger = logging.getLogger("tests.deferred")
+    logger.propagate = False
+    collected = ListHandler()
+    logger.addHandler(collected)
+    _install_queue(logger)
+    probe = Probe()
+    try:
+        logger.warning("formatted %s", probe)
+    finally:
+        shutdown_logging()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+
+    assert collected.messages == ["formatted probe"]
+    assert threading.current_thread().name not in probe.threads
@@ -0,0 +1,62 @@
+import re
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db.fast_path import CAR_COLUMNS, DATA_COLUMNS, VALIDATOR_COLUMNS, FastPath
+from app.db.manager import DBManager
+
+
+def set_clause(sql: str) -> dict[str, str]:
+    """Split the `DO UPDATE SET` clause of an upsert into normalized `column: expression` pairs."""
+    clause = re.split(r"DO UPDATE SET", sql, flags=re.IGNORECASE)[1]
+    clause = re.split(r"\bRETURNING\b", clause, flags=re.IGNORECASE)[0]
+    assignments, depth, current = [], 0, ""
+    for char in clause:
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        if char == "," and depth == 0:
+            assignments.append(current)
+            current = ""
+        else:
+            current += char
+    assignments.append(current)
+    pairs = (assignment.split("=", 1) for assignment in assignments)
+    return {column.strip(): re.sub(r"\s+", "", expression).lower() for column, expression in pairs}
+
+
+def changed_columns(expression: str) -> set[str]:
+    """Return the columns compared in a `datetime_updated` CASE expression."""
+    return set(re.findall(r"cars\.(\w+)isdistinctfrom", expression))
+
+
+@pytest.fixture
+def clauses() -> tuple[dict[str, str], dict[str, str]]:
+    """Return the SET clauses of the ORM and the asyncpg upsert for the same columns."""
+    car = dict.fromkeys(CAR_COLUMNS)
+    orm = DBManager.build_upsert(car).compile(dialect=postgresql.dialect())
+    return set_clause(str(orm)), set_clause(FastPath.UPSERT_CAR)
+
+
+def test_both_paths_update_the_same_columns(clauses: tuple[dict[str, str], dict[str, str]]) -> None:
+    """The ORM and asyncpg upserts set the same columns."""
+    orm, fast = clauses
+    assert set(orm) == set(fast)
+
+
+def test_validators_are_kept_when_missing(clauses: tuple[dict[str, str], dict[str, str]]) -> None:
+    """Both paths keep a stored validator when the response did not carry one."""
+    for clause in clauses:
+        for column in VALIDATOR_COLUMNS:
+            assert clause[column] == f"coalesce(excluded.{column},cars.{column})"
+
+
+def test_data_columns_and_timestamps_match(clauses: tuple[dict[str, str], dict[str, str]]) -> None:
+    """Both paths overwrite the data columns, bump `datetime_updated` on the same changes and set `datetime_fetched`."""
+    orm, fast = clauses
+    data_columns = {column for column in DATA_COLUMNS if column != "url"}
+    for clause in clauses:
+        assert {column: clause[column] for column in data_columns} == {
+            column: f"excluded.{column}" for column in data_columns
+        }
+        assert clause["datetime_fetched"] == "now()"
+    assert changed_columns(orm["datetime_updated"]) == changed_columns(fast["datetime_updated"]) == data_columns
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from app.scraper import work_queue
+from app.scraper.work_queue import QUEUE_AGING_SECONDS, CrawlQueue, CrawlTask, car_priority
+
+DAY = 86400
+
+
+def test_new_listing_on_a_deep_page_before_refresh_on_a_shallow_page() -> None:
+    """The new-versus-refresh tier outranks the page depth."""
+    new = car_priority(is_new=True, age_seconds=0, page=150, position=19)
+    refresh = car_priority(is_new=False, age_seconds=DAY, page=5, position=0)
+    assert new < refresh
+
+
+def test_changed_listing_ranks_with_new_listings() -> None:
+    """A known listing whose price changed ranks in the new listing tier."""
+    changed = car_priority(is_new=False, changed=True, age_seconds=DAY, page=9000, position=0)
+    refresh = car_priority(is_new=False, age_seconds=49 * DAY, page=1, position=0)
+    assert changed < refresh
+
+
+def test_older_refresh_before_newer_refresh_on_an_earlier_page() -> None:
+    """Among refreshes the age comes before the page."""
+    older = car_priority(is_new=False, age_seconds=10 * DAY, page=300, position=0)
+    newer = car_priority(is_new=False, age_seconds=DAY, page=1, position=0)
+    assert older < newer
+
+
+def test_page_and_position_order_within_a_tier() -> None:
+    """Within a tier earlier pages and positions come first."""
+    assert car_priority(is_new=True, age_seconds=0, page=1, position=5) < car_priority(
+        is_new=True, age_seconds=0, page=1, position=6,
+    )
+    assert car_priority(is_new=False, age_seconds=DAY, page=1, position=19) < car_priority(
+        is_new=False, age_seconds=DAY, page=2, position=0,
+    )
+
+
+def test_queue_serves_new_listings_before_refreshes() -> None:
+    """The queue serves a deep new listing before a shallow refresh enqueued earlier."""
+    queue = CrawlQueue({"default": 1})
+    queue.put_nowait(CrawlTask(
+        target="default", url="refresh", priority=car_priority(is_new=False, age_seconds=DAY, page=1, position=0),
+    ))
+    queue.put_nowait(CrawlTask(
+        target="default", url="new", priority=car_priority(is_new=True, age_seconds=0, page=150, position=0),
+    ))
+    assert [queue.get_nowait().url, queue.get_nowait().url] == ["new", "refresh"]
+
+
+def test_refresh_overtakes_new_listings_after_waiting_one_aging_period(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A refresh that waited QUEUE_AGING_SECONDS is served before newly enqueued new listings."""
+    now = time.monotonic()
+    monkeypatch.setattr(work_queue.time, "monotonic", lambda: now)
+    queue = CrawlQueue({"default": 1})
+    queue.put_nowait(CrawlTask(
+        target="default", url="refresh", priority=car_priority(is_new=False, age_seconds=0, page=1, position=0),
+    ))
+    monkeypatch.setattr(work_queue.time, "monotonic", lambda: now + 2 * float(QUEUE_AGING_SECONDS))
+    queue.put_nowait(CrawlTask(
+        target="default", url="new", priority=car_priority(is_new=True, age_seconds=0, page=1, position=0),
+    ))
+    assert queue.get_nowait().url == "refresh"